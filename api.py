@@ -0,0 +1,189 @@
+import json
+
+from flask import Blueprint, Response, abort, current_app, request
+from werkzeug.exceptions import HTTPException
+
+from models import db, Artist, Venue, Show
+from pagination import PageStream, get_page_size
+from budget import query_budget
+from engine import stream_with_session
+
+# orjson is in requirements.txt; the standard json module is a slower
+# fallback for installs without it
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+#----------------------------------------------------------------------------#
+# Read-only JSON API.
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# rows are encoded one at a time but written out in chunks of this many
+STREAM_CHUNK_ROWS = 200
+
+
+def dumps(obj):
+  if orjson is not None:
+    return orjson.dumps(obj)
+  return json.dumps(obj, separators=(',', ':'), default=lambda value: value.isoformat()).encode()
+
+
+def json_response(obj, status=200):
+  return Response(dumps(obj), status=status, mimetype='application/json')
+
+
+# the app's own 404 and 500 handlers render HTML, so those codes are
+# claimed explicitly for the API
+@api.errorhandler(404)
+@api.errorhandler(500)
+@api.errorhandler(HTTPException)
+def http_error(error):
+  return json_response({'error': error.name, 'message': error.description}, error.code)
+
+
+#  Fields
+#  ----------------------------------------------------------------
+
+def model_fields(model):
+  return {name: column for name, column in model.__table__.columns.items()}
+
+ARTIST_FIELDS = model_fields(Artist)
+VENUE_FIELDS = model_fields(Venue)
+SHOW_FIELDS = dict(model_fields(Show), **{
+  'venue_name': Venue.name,
+  'venue_image_link': Venue.image_link,
+  'artist_name': Artist.name,
+  'artist_image_link': Artist.image_link
+})
+
+
+def selected_fields(available):
+  # ?fields=id,name limits both the response and the columns selected
+  requested = request.args.get('fields')
+  if not requested:
+    return list(available)
+  fields = [name.strip() for name in requested.split(',') if name.strip()]
+  unknown = [name for name in fields if name not in available]
+  if unknown:
+    abort(400, 'Unknown fields: ' + ', '.join(unknown))
+  return fields
+
+
+def select_fields(available, fields, required=()):
+  # key columns are always selected, even when not returned
+  names = list(dict.fromkeys(list(required) + fields))
+  return db.session.query(*[available[name].label(name) for name in names])
+
+
+def join_show_counterparts(query, fields):
+  if any(name.startswith('venue_') and name != 'venue_id' for name in fields):
+    query = query.join(Venue, Venue.id == Show.venue_id)
+  if any(name.startswith('artist_') and name != 'artist_id' for name in fields):
+    query = query.join(Artist, Artist.id == Show.artist_id)
+  return query
+
+
+#  Responses
+#  ----------------------------------------------------------------
+
+def stream_page(page, fields):
+  # the list is written out while rows are still being fetched, so memory
+  # stays flat however large the page is
+  def generate():
+    yield b'{"data":['
+    chunk = []
+    separator = b''
+    for row in page:
+      chunk.append(dumps({name: row._mapping[name] for name in fields}))
+      if len(chunk) == STREAM_CHUNK_ROWS:
+        yield separator + b','.join(chunk)
+        chunk = []
+        separator = b','
+    if chunk:
+      yield separator + b','.join(chunk)
+    yield b'],"next":' + dumps(page.next_cursor) + b',"prev":' + dumps(page.prev_cursor) + b'}'
+  return Response(stream_with_session(generate()), mimetype='application/json')
+
+
+def list_page(query, columns, key, descending=False):
+  return PageStream(query, columns, key,
+    cursor=request.args.get('cursor'),
+    per_page=get_page_size('API_PAGE_SIZE', 'API_MAX_PAGE_SIZE'),
+    descending=descending)
+
+
+def detail(available, fields, id_column, entity_id, query=None):
+  query = query if query is not None else select_fields(available, fields)
+  row = query.filter(id_column == entity_id).first()
+  if row is None:
+    abort(404)
+  return json_response({name: row._mapping[name] for name in fields})
+
+
+def search_results(collection_name):
+  # an empty search would match every row, so one is required; only the
+  # best per_page matches are returned, with the number of all of them
+  query, genres = request.args.get('q', '').strip(), request.args.getlist('genre')
+  if not query and not genres:
+    abort(400, 'Pass a search term in q or a genre.')
+  count, results = current_app.extensions['search_index'].search(collection_name, query, genres,
+    limit=get_page_size('API_PAGE_SIZE', 'API_MAX_PAGE_SIZE'))
+  return json_response({'count': count, 'data': results})
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@api.route('/artists')
+def list_artists():
+  fields = selected_fields(ARTIST_FIELDS)
+  query = select_fields(ARTIST_FIELDS, fields, required=['id'])
+  return stream_page(list_page(query, [Artist.id], key=lambda row: (row.id,)), fields)
+
+@api.route('/artists/<int:artist_id>')
+@query_budget(1)
+def get_artist(artist_id):
+  return detail(ARTIST_FIELDS, selected_fields(ARTIST_FIELDS), Artist.id, artist_id)
+
+@api.route('/artists/search')
+def search_artists():
+  return search_results('artists')
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@api.route('/venues')
+def list_venues():
+  fields = selected_fields(VENUE_FIELDS)
+  query = select_fields(VENUE_FIELDS, fields, required=['id'])
+  return stream_page(list_page(query, [Venue.id], key=lambda row: (row.id,)), fields)
+
+@api.route('/venues/<int:venue_id>')
+@query_budget(1)
+def get_venue(venue_id):
+  return detail(VENUE_FIELDS, selected_fields(VENUE_FIELDS), Venue.id, venue_id)
+
+@api.route('/venues/search')
+def search_venues():
+  return search_results('venues')
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+def list_shows():
+  # newest first, like /shows
+  fields = selected_fields(SHOW_FIELDS)
+  query = join_show_counterparts(select_fields(SHOW_FIELDS, fields, required=['start_time', 'id']), fields)
+  page = list_page(query, [Show.start_time, Show.id], key=lambda row: (row.start_time, row.id), descending=True)
+  return stream_page(page, fields)
+
+@api.route('/shows/<int:show_id>')
+@query_budget(1)
+def get_show(show_id):
+  fields = selected_fields(SHOW_FIELDS)
+  query = join_show_counterparts(select_fields(SHOW_FIELDS, fields), fields)
+  return detail(SHOW_FIELDS, fields, Show.id, show_id, query)
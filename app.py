@@ -2,188 +2,301 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-from datetime import date
-import json
-import sys
-from wsgiref.validate import validator
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+from datetime import datetime
+import os
+import click
+from flask import Flask, abort, current_app, render_template, request, flash, redirect, url_for
+from flask.cli import ScriptInfo
 from flask_moment import Moment
-import logging
-from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from flask_migrate import Migrate
+from jinja2 import FileSystemBytecodeCache
+from forms import VenueForm, ArtistForm, ShowForm
 from models import db, Artist, Venue, Show
+from search import SearchIndex
+import queries
+from counters import counters_cli
+from partitions import partitions_cli
+from cache import PageCache
+from conditional import conditional
+from filters import format_datetime
+from api import api
+from importer import import_command
+from exporter import exports, export_command
+from deletion import deletions, delete_command, delete_rows
+import engine
+import routing
+from routing import primary
+import metrics
+import logs
+import budget
+from budget import query_budget
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db.init_app(app)
-migrate = Migrate(app, db)
+moment = Moment()
+search_index = SearchIndex()
+page_cache = PageCache()
+
+# the views below are collected here and added to every app create_app builds
+url_rules = []
+
+def route(rule, **options):
+  def decorator(view):
+    url_rules.append((rule, view, options))
+    return view
+  return decorator
+
+
+def create_app(config_object='config', require_secret_key=False):
+  app = Flask(__name__)
+  app.config.from_object(config_object)
+  init_secret_key(app, require_secret_key)
+  moment.init_app(app)
+  engine.init_app(app)
+  db.init_app(app)
+  routing.init_app(app)
+  metrics.init_app(app)
+  budget.init_app(app)
+  init_migrate(app)
+  search_index.init_app(app)
+  page_cache.init_app(app)
+  app.cli.add_command(counters_cli)
+  app.cli.add_command(partitions_cli)
+  app.cli.add_command(import_command)
+  app.cli.add_command(export_command)
+  app.cli.add_command(delete_command)
+  app.register_blueprint(api)
+  app.register_blueprint(exports)
+  app.register_blueprint(deletions)
+  app.jinja_env.filters['datetime'] = format_datetime
+  init_bytecode_cache(app)
+
+  for rule, view, options in url_rules:
+    app.add_url_rule(rule, view_func=view, **options)
+  app.register_error_handler(404, not_found_error)
+  app.register_error_handler(500, server_error)
+
+  if not app.debug:
+      logs.init_app(app)
+  return app
+
+def init_secret_key(app, required):
+  # the serving entry points require a key; several workers, or a restarted
+  # one, would otherwise each sign sessions with a key of their own
+  if app.config.get('SECRET_KEY'):
+    return
+  if required:
+    raise RuntimeError('SECRET_KEY is not set. Every worker would generate its own key and reject '
+      'the sessions the others signed; set SECRET_KEY in the environment.')
+  app.config['SECRET_KEY'] = os.urandom(32)
+
+def init_migrate(app):
+  # alembic takes half of the app's import time and only the 'flask db'
+  # commands need it, so it is left out when serving requests
+  context = click.get_current_context(silent=True)
+  if context is None or context.find_object(ScriptInfo) is None:
+    return
+  from flask_migrate import Migrate
+  Migrate(app, db)
+
+def init_bytecode_cache(app):
+  # compiled templates are kept on disk, so a new process skips compiling
+  # the templates it has already seen
+  directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+  if not directory:
+    return
+  try:
+    os.makedirs(directory, exist_ok=True)
+  except OSError as error:
+    app.logger.warning('Template bytecode cache disabled: %s', error)
+    return
+  # e.g. a read-only filesystem; templates are then compiled in every process
+  if not os.access(directory, os.W_OK | os.X_OK):
+    app.logger.warning('Template bytecode cache disabled: %s is not writable', directory)
+    return
+  app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
 
 #----------------------------------------------------------------------------#
-# Filters.
+# Warm-up.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'): #DONE
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
+# Rendered once by warm_up, in the gunicorn master before it forks, so the
+# workers start with compiled templates, compiled SQL and a built search
+# index in memory they share.
+WARM_PAGES = ('/', '/venues', '/artists', '/shows')
 
-app.jinja_env.filters['datetime'] = format_datetime
+def warm_up(app):
+  for name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(name)
+  try:
+    for path in WARM_PAGES:
+      with app.test_request_context(path):
+        app.dispatch_request()
+    with app.app_context():
+      search_index.ensure_built()
+  except Exception:
+    app.logger.warning('Skipped warming up the hot queries', exc_info=True)
+  finally:
+    with app.app_context():
+      # the workers must open their own connections, not share the master's
+      db.session.remove()
+      for bind_engine in db.engines.values():
+        bind_engine.dispose()
+
+#----------------------------------------------------------------------------#
+# Page data.
+#----------------------------------------------------------------------------#
+
+# shared by the views below and their async counterparts in async_views.py
+
+def venue_areas(rows):
+  # rows come ordered by area so the areas can be built in a single pass
+  data = []
+  area = None
+  for row in rows:
+    if area is None or (area['city'], area['state']) != (row.city, row.state):
+      area = {
+        'city': row.city,
+        'state': row.state,
+        'venues': []
+      }
+      data.append(area)
+    area['venues'].append({
+      'id': row.id,
+      'name': row.name,
+      'num_upcoming_shows': row.num_upcoming_shows
+    })
+  return data
+
+def venue_page(venue):
+  # split past from upcoming shows in a single pass against one 'now'
+  now = datetime.now()
+  past_shows = []
+  upcoming_shows = []
+  for show in venue.shows:
+    (upcoming_shows if show.start_time > now else past_shows).append({
+      'artist_id': show.artist_id,
+      'artist_name': show.artist.name,
+      'artist_image_link': show.artist.image_link,
+      'start_time': show.start_time
+    })
+
+  return {
+    "id" : venue.id,
+    "name": venue.name,
+    "genres": venue.genres,
+    "city": venue.city,
+    "state": venue.state,
+    "address": venue.address,
+    "phone": venue.phone,
+    "website_link": venue.website_link,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking_talent,
+    "seeking_description": venue.seeking_description,
+    "image_link": venue.image_link,
+    "past_shows": past_shows,
+    "upcoming_shows": upcoming_shows,
+    "past_shows_count": len(past_shows),
+    "upcoming_shows_count": len(upcoming_shows)
+  }
+
+def artist_page(artist):
+  # split past from upcoming shows in a single pass against one 'now'
+  now = datetime.now()
+  past_shows = []
+  upcoming_shows = []
+  for show in artist.shows:
+    (upcoming_shows if show.start_time > now else past_shows).append({
+      'venue_id': show.venue_id,
+      'venue_name': show.venue.name,
+      'venue_image_link': show.venue.image_link,
+      'start_time': show.start_time
+    })
+
+  return {
+    "id" : artist.id,
+    "name": artist.name,
+    "genres": artist.genres,
+    "city": artist.city,
+    "state": artist.state,
+    "phone": artist.phone,
+    "website_link": artist.website_link,
+    "facebook_link": artist.facebook_link,
+    "seeking_venue": artist.seeking_venue,
+    "seeking_description": artist.seeking_description,
+    "image_link": artist.image_link,
+    "past_shows": past_shows,
+    "upcoming_shows": upcoming_shows,
+    "past_shows_count": len(past_shows),
+    "upcoming_shows_count": len(upcoming_shows)
+  }
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@route('/')
+@query_budget(3)
+@conditional('artists', 'venues')
+@page_cache.cached('artists', 'venues')
 def index():
-  recent_artists = Artist.query.order_by(Artist.date_listed.desc()).limit(5)
-  recent_venues = Venue.query.order_by(Venue.date_listed.desc()).limit(5)
+  recent_artists = db.session.execute(queries.recently_listed(Artist)).scalars().all()
+  recent_venues = db.session.execute(queries.recently_listed(Venue)).scalars().all()
   return render_template('pages/home.html', artist_listings = recent_artists, venue_listings = recent_venues)
 
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues') #COMPLETED
+@route('/venues') #COMPLETED
+@query_budget(2)
+@conditional('venues', 'shows')
+@page_cache.cached('venues', 'shows')
 def venues():
   # fetch real venues data.
-  data = []
-  all_venues = Venue.query.all()
-  unique_venues = Venue.query.distinct(Venue.city, Venue.state).all()
-
-  # data model to be returned
-  for un_venue in unique_venues:
-    data.append({
-      'city': un_venue.city,
-      'state': un_venue.state,
-      'venues':[]
-    })
-  # populate venues data
-  for venue in all_venues:
-    #calculate for num_upcoming_shows aggregating based on number of upcoming shows per venue.
-    def get_upcoming_shows():
-      up_shows =[]
-      for show in venue.shows:
-        if show.start_time > datetime.now():
-          up_shows.append(show)
-      return len(up_shows)
-
-    for un_venue in data:
-      if un_venue['city'] == venue.city and un_venue['state'] == venue.state:
-        un_venue['venues'].append({
-          'id': venue.id,
-          'name': venue.name,
-          'num_upcoming_shows': get_upcoming_shows()
-        })
- 
-  return render_template('pages/venues.html', areas=data);
-
-@app.route('/venues/search', methods=['POST']) #COMPLETED
+  page = queries.venues.paginate(db.session, request.args.get('cursor'))
+  return render_template('pages/venues.html', areas=venue_areas(page), page=page);
+
+@route('/venues/search', methods=['POST']) #COMPLETED
 def search_venues():
-  # implement search on venues with partial string search. Ensure it is case-insensitive.
-  # seach for Hop should return "The Musical Hop".
+  # search on venues matches the start of words in the name, city, state and
+  # genres, case-insensitively; every term must match.
+  # search for "Hop" should return "The Musical Hop".
   # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
   search_term = request.form.get('search_term', '')
-  db_search_results = Venue.query.filter(Venue.name.ilike('%' + search_term + '%')).all()
-  venues = Venue.query.all()
-
-  def count_upcoming_shows():
-    up_shows =[]
-    for venue in venues:
-      for show in venue.shows:
-        if show.start_time > datetime.now():
-          up_shows.append(show)
-    return len(up_shows)
-
-  def get_search_result_data():
-    data = []
-    for search_result in db_search_results:
-      data.append({
-        'id': search_result.id,
-        'name': search_result.name,
-        'num_upcoming_shows': count_upcoming_shows()
-      })
-    return data
+  # answered from the in-memory index, genre filters come from 'genre:<name>'
+  # in the search term or from repeated 'genres' form fields.
+  search_results = search_index.search_venues(search_term, request.form.getlist('genres'))
 
   response={
-    'count': len(db_search_results),
-    'data': get_search_result_data()
+    'count': len(search_results),
+    'data': [{
+      'id': search_result['id'],
+      'name': search_result['name'],
+      'num_upcoming_shows': search_result['num_upcoming_shows']
+    } for search_result in search_results]
   }
   return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
 
-@app.route('/venues/<int:venue_id>') #COMPLETED
+@route('/venues/<int:venue_id>') #COMPLETED
+@query_budget(2)
+@conditional('venues', 'shows', 'artists')
+@page_cache.cached('venues', 'shows', 'artists')
 def show_venue(venue_id):
   # shows the venue page with the given venue_id
-  venue = Venue.query.get_or_404(venue_id)
-  
-  def get_upcoming_shows():
-    upcoming = []
-    for show in venue.shows:
-      if show.start_time > datetime.now():
-        upcoming.append({
-          'artist_id': show.artist_id,
-          'artist_name': show.artist.name,
-          'artist_image_link': show.artist.image_link,
-          'start_time': str(show.start_time)
-        })
-    return upcoming
-  
-  def get_past_shows():
-    past = []
-    for show in venue.shows:
-      if show.start_time <= datetime.now():
-        past.append({
-          'artist_id': show.artist_id,
-          'artist_name': show.artist.name,
-          'artist_image_link': show.artist.image_link,
-          'start_time': str(show.start_time)
-        })
-    return past
-  
-  def get_upcoming_count():
-    return len(get_upcoming_shows())   
- 
-  def get_past_count():
-    return len(get_past_shows())
-    
-  data = {
-    "id" : venue.id,
-    "name": venue.name,
-    "genres": venue.genres,
-    "city": venue.city,
-    "state": venue.state,
-    "address": venue.address,
-    "phone": venue.phone,
-    "website_link": venue.website_link,
-    "facebook_link": venue.facebook_link,
-    "seeking_talent": venue.seeking_talent,
-    "seeking_description": venue.seeking_description,
-    "image_link": venue.image_link,
-    "past_shows":get_past_shows(),
-    "upcoming_shows": get_upcoming_shows(),
-    "past_shows_count": get_past_count(),
-    "upcoming_shows_count": get_upcoming_count()
-  }
-  return render_template('pages/show_venue.html', venue=data)
+  venue = db.session.execute(queries.venue_detail(venue_id)).unique().scalar_one_or_none()
+  if venue is None:
+    abort(404)
+  return render_template('pages/show_venue.html', venue=venue_page(venue))
 
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET']) #DONE
+@route('/venues/create', methods=['GET']) #DONE
 def create_venue_form():
   form = VenueForm()
   return render_template('forms/new_venue.html', form=form)
 
-@app.route('/venues/create', methods=['POST']) #COMPLETED
+@route('/venues/create', methods=['POST']) #COMPLETED
 def create_venue_submission():
   # insert form data as a new Venue record in the db, instead
   ven_form = VenueForm(request.form)
@@ -204,9 +317,10 @@ def create_venue_submission():
     )
     db.session.add(venue)
     db.session.commit()
+    search_index.add_venue(venue)
      # on successful db insert, flash success
     flash('Venue ' + request.form['name'] + ' was successfully listed!')
-    print('Venue ' + request.form['name'] + ' was successfully listed!')
+    current_app.logger.info('venue listed', extra={'fields': {'venue_id': venue.id}})
   except:
     db.session.rollback()
     # on unsuccessful db insert, flash an error instead.
@@ -216,20 +330,23 @@ def create_venue_submission():
 
     return redirect(url_for('index'))
 
-@app.route('/venues/<venue_id>/delete') #COMPLETED
+@route('/venues/<int:venue_id>/delete') #COMPLETED
+@primary
 def delete_venue(venue_id):
   # Completed endpoint for taking a venue_id, and using
   # SQLAlchemy ORM to delete a record. 
-  venue_to_delete = Venue.query.filter(Venue.id == venue_id).one()
+  venue_to_delete = db.get_or_404(Venue, venue_id)
+  # read before the delete expires it
+  venue_name = venue_to_delete.name
   try:
-    db.session.delete(venue_to_delete)
-    db.session.commit()
-    flash('Venue ' + venue_to_delete.name + ' was successfully deleted!')
+    # one statement; the database deletes the venue's shows
+    delete_rows('venues', [venue_to_delete.id])
+    flash('Venue ' + venue_name + ' was successfully deleted!')
     
   #Handle cases where the session commit could fail.
   except:
     db.session.rollback()
-    flash('Venue ' + venue_to_delete.name + ' was not successfully Deleted!')
+    flash('Venue ' + venue_name + ' was not successfully Deleted!')
   finally:
     db.session.close()
   # BONUS CHALLENGE: Implemented a button to delete a Venue on a Venue Page, have it so that
@@ -238,109 +355,58 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists') #COMPLETED
+@route('/artists') #COMPLETED
+@query_budget(2)
+@conditional('artists')
+@page_cache.cached('artists')
 def artists():
   # real data returned from querying the database
-  data = Artist.query.order_by(Artist.id.asc()).all()
-  return render_template('pages/artists.html', artists=data)
+  data = queries.artists.paginate(db.session, request.args.get('cursor'))
+  return render_template('pages/artists.html', artists=data, page=data)
 
-@app.route('/artists/search', methods=['POST']) #COMPLETED
+@route('/artists/search', methods=['POST']) #COMPLETED
 def search_artists():
-  # implement search on artists with partial string search. Ensure it is case-insensitive.
-  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search on artists matches the start of words in the name, city, state and
+  # genres, case-insensitively; every term must match.
+  # search for "Gun" should return "Guns N Petals".
   # search for "band" should return "The Wild Sax Band".
   search_term = request.form.get('search_term', '')
-  db_search_results = Artist.query.filter(Artist.name.ilike('%' + search_term + '%')).all()
-  artists = Artist.query.all()
-
-  def count_upcoming_shows():
-    up_shows =[]
-    for artist in artists:
-      for show in artist.shows:
-        if show.start_time > datetime.now():
-          up_shows.append(show)
-    return len(up_shows)
-
-  def get_search_result_data():
-    data = []
-    for search_result in db_search_results:
-      data.append({
-        'id': search_result.id,
-        'name': search_result.name,
-        'num_upcoming_shows': count_upcoming_shows()
-      })
-    return data
+  # answered from the in-memory index, genre filters come from 'genre:<name>'
+  # in the search term or from repeated 'genres' form fields.
+  search_results = search_index.search_artists(search_term, request.form.getlist('genres'))
 
   response={
-    'count': len(db_search_results),
-    'data': get_search_result_data()
+    'count': len(search_results),
+    'data': [{
+      'id': search_result['id'],
+      'name': search_result['name'],
+      'num_upcoming_shows': search_result['num_upcoming_shows']
+    } for search_result in search_results]
   }
   return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
 
-@app.route('/artists/<int:artist_id>') #COMPLETED
+@route('/artists/<int:artist_id>') #COMPLETED
+@query_budget(2)
+@conditional('artists', 'shows', 'venues')
+@page_cache.cached('artists', 'shows', 'venues')
 def show_artist(artist_id):
   # shows the artist page with the given artist_id
-  artist = Artist.query.get_or_404(artist_id)
-
-  def get_upcoming_shows():
-    upcoming = []
-    for show in artist.shows:
-      if show.start_time > datetime.now():
-        upcoming.append({
-          'venue_id': show.venue_id,
-          'venue_name': show.venue.name,
-          'venue_image_link': show.venue.image_link,
-          'start_time': str(show.start_time)
-        })
-    return upcoming
-  
-  def get_past_shows():
-    past = []
-    for show in artist.shows:
-      if show.start_time <= datetime.now():
-        past.append({
-          'venue_id': show.venue_id,
-          'venue_name': show.venue.name,
-          'venue_image_link': show.venue.image_link,
-          'start_time': str(show.start_time)
-        })
-    return past
-  
-  def get_upcoming_count():
-    return len(get_upcoming_shows())
-    
-  def get_past_count():
-    return len(get_past_shows())
-    
-  data = {
-    "id" : artist.id,
-    "name": artist.name,
-    "genres": artist.genres,
-    "city": artist.city,
-    "state": artist.state,
-    "phone": artist.phone,
-    "website_link": artist.website_link,
-    "facebook_link": artist.facebook_link,
-    "seeking_venue": artist.seeking_venue,
-    "seeking_description": artist.seeking_description,
-    "image_link": artist.image_link,
-    "past_shows":get_past_shows(),
-    "upcoming_shows": get_upcoming_shows(),
-    "past_shows_count": get_past_count(),
-    "upcoming_shows_count": get_upcoming_count()
-  }
-  return render_template('pages/show_artist.html', artist=data)
+  artist = db.session.execute(queries.artist_detail(artist_id)).unique().scalar_one_or_none()
+  if artist is None:
+    abort(404)
+  return render_template('pages/show_artist.html', artist=artist_page(artist))
   
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET']) #COMPLETED
+@route('/artists/<int:artist_id>/edit', methods=['GET']) #COMPLETED
+@query_budget(1)
 def edit_artist(artist_id):
   # Populate form with fields from artist with ID <artist_id>
   artist = Artist.query.filter(Artist.id == artist_id).first()
   form = ArtistForm(obj = artist)
   return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST']) #COMPLETED
+@route('/artists/<int:artist_id>/edit', methods=['POST']) #COMPLETED
 def edit_artist_submission(artist_id):
   # Takes values from the form submitted, and updates existing
   # artist record with ID <artist_id> using the new attributes
@@ -361,6 +427,7 @@ def edit_artist_submission(artist_id):
     }
     Artist.query.filter_by(id=artist_id).update(artist)
     db.session.commit()
+    search_index.add_artist(db.session.get(Artist, artist_id))
      # on successful update, flash success
     flash('Artist ' + request.form['name'] + ' was successfully updated!')
   except:
@@ -372,14 +439,15 @@ def edit_artist_submission(artist_id):
 
   return redirect(url_for('show_artist', artist_id=artist_id))
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET']) #COMPLETED
+@route('/venues/<int:venue_id>/edit', methods=['GET']) #COMPLETED
+@query_budget(1)
 def edit_venue(venue_id):
   # Populate form with values from venue with ID <venue_id>
   venue = Venue.query.filter(Venue.id == venue_id).first()
   form = VenueForm(obj = venue)
   return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST']) #COMPLETED
+@route('/venues/<int:venue_id>/edit', methods=['POST']) #COMPLETED
 def edit_venue_submission(venue_id):
   # Take values from the form submitted, and updates existing
   # venue record with ID <venue_id> using the new attributes
@@ -400,6 +468,7 @@ def edit_venue_submission(venue_id):
     }
     Venue.query.filter_by(id = venue_id).update(venue)
     db.session.commit()
+    search_index.add_venue(db.session.get(Venue, venue_id))
      # on successful db insert, flash success
     flash('Venue ' + request.form['name'] + ' was successfully updated!')
   except:
@@ -413,12 +482,12 @@ def edit_venue_submission(venue_id):
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET']) #DONE
+@route('/artists/create', methods=['GET']) #DONE
 def create_artist_form():
   form = ArtistForm()
   return render_template('forms/new_artist.html', form=form)
 
-@app.route('/artists/create', methods=['POST']) #COMPLETED
+@route('/artists/create', methods=['POST']) #COMPLETED
 def create_artist_submission():
   artist_form = ArtistForm(request.form)
   try:
@@ -437,6 +506,7 @@ def create_artist_submission():
     )
     db.session.add(artist)
     db.session.commit()
+    search_index.add_artist(artist)
      # on successful db insert, flash success
     flash('Artist ' + request.form['name'] + ' was successfully listed!')
   except:
@@ -451,33 +521,22 @@ def create_artist_submission():
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows') #COMPLETED
+@route('/shows') #COMPLETED
+@query_budget(2)
+@conditional('shows', 'artists', 'venues')
+@page_cache.cached('shows', 'artists', 'venues')
 def shows():
   # displays list of shows at /shows
-  # real shows data.
-  data=[]
-  shows = Show.query.order_by(Show.start_time.desc()).all()
-  
-  for show in shows:
-    show_venue = Venue.query.filter_by(id=show.venue_id).first()
-    show_artist = Artist.query.filter_by(id=show.artist_id).first()
-    data.append({
-      'venue_id': show_venue.id,
-      'venue_name': show_venue.name,
-      'artist_id': show_artist.id,
-      'artist_name': show_artist.name,
-      'artist_image_link': show_artist.image_link,
-      'start_time': str(show.start_time)
-    })
-  return render_template('pages/shows.html', shows=data)
+  data = queries.shows.paginate(db.session, request.args.get('cursor'))
+  return render_template('pages/shows.html', shows=data, page=data)
 
-@app.route('/shows/create') #DONE
+@route('/shows/create') #DONE
 def create_shows():
   # renders form. do not touch.
   form = ShowForm()
   return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST']) #COMPLETED
+@route('/shows/create', methods=['POST']) #COMPLETED
 def create_show_submission():
   # called to create new shows in the db, upon submitting new show listing form
   # insert form data as a new Show record in the db, instead
@@ -491,6 +550,7 @@ def create_show_submission():
     )
     db.session.add(show)
     db.session.commit()
+    search_index.add_show(show)
     # on successful db insert, flash success
     flash('Show was successfully listed!')
 
@@ -502,36 +562,24 @@ def create_show_submission():
   finally:
     return render_template('pages/home.html')
 
-@app.errorhandler(404)  #DONE
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)  #DONE
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,14 @@
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from async_views import AsyncReads
+
+wsgi_app = create_app(require_secret_key=True)
+
+# listing and detail pages run on the async engine, everything else on the
+# WSGI app in a thread pool
+app = AsyncReads(wsgi_app, WsgiToAsgi(wsgi_app))
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app)
@@ -0,0 +1,259 @@
+import asyncio
+import io
+import sys
+
+from flask import abort, current_app, g, render_template, request, session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+from app import page_cache, venue_areas, venue_page, artist_page
+from models import Artist, Venue
+from conditional import validators_key, validators_statement, make_validators, skips_validation, is_not_modified, add_validators
+import queries
+import routing
+
+#----------------------------------------------------------------------------#
+# Async read views.
+#----------------------------------------------------------------------------#
+
+# The listing and detail pages are served here on an async engine, so one
+# process can wait on many queries at once. They render the same templates
+# with the same page data as their sync views in app.py, keep the same
+# conditional GET and page cache, and honour the read replica. Everything
+# else is handed to the WSGI app.
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+psycopg_async'}
+
+
+def async_database_uri(uri):
+  url = make_url(uri)
+  return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+class AsyncDatabase:
+  # async engines for the primary and the replica, created on first use so
+  # they belong to the server's event loop
+
+  def __init__(self):
+    self.engines = {}
+    self.sessions = {}
+
+  def engine_options(self):
+    # the sync pool class does not work with async drivers
+    options = dict(current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    options.pop('poolclass', None)
+    return options
+
+  def uri(self, bind):
+    if bind is not None:
+      return async_database_uri(current_app.config['SQLALCHEMY_BINDS'][bind])
+    return current_app.config.get('ASYNC_DATABASE_URI') or async_database_uri(current_app.config['SQLALCHEMY_DATABASE_URI'])
+
+  def session(self):
+    replica = routing.REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}) and routing.reads_from_replica()
+    bind = routing.REPLICA_BIND if replica else None
+    if bind not in self.sessions:
+      self.engines[bind] = create_async_engine(self.uri(bind), **self.engine_options())
+      self.sessions[bind] = async_sessionmaker(self.engines[bind])
+    return self.sessions[bind]()
+
+  async def dispose(self):
+    for engine in self.engines.values():
+      await engine.dispose()
+    self.engines = {}
+    self.sessions = {}
+
+database = AsyncDatabase()
+
+
+#  Views
+#  ----------------------------------------------------------------
+
+async def index():
+  # the two listings are independent, so they run at the same time on two
+  # connections
+  async def recently_listed(model):
+    async with database.session() as s:
+      result = await s.execute(queries.recently_listed(model))
+      return result.scalars().all()
+
+  recent_artists, recent_venues = await asyncio.gather(recently_listed(Artist), recently_listed(Venue))
+  return render_template('pages/home.html', artist_listings = recent_artists, venue_listings = recent_venues)
+
+async def venues():
+  async with database.session() as s:
+    page = await queries.venues.paginate_async(s, request.args.get('cursor'))
+  return render_template('pages/venues.html', areas=venue_areas(page), page=page)
+
+async def show_venue(venue_id):
+  async with database.session() as s:
+    venue = (await s.execute(queries.venue_detail(venue_id))).unique().scalar_one_or_none()
+  if venue is None:
+    abort(404)
+  return render_template('pages/show_venue.html', venue=venue_page(venue))
+
+async def artists():
+  async with database.session() as s:
+    data = await queries.artists.paginate_async(s, request.args.get('cursor'))
+  return render_template('pages/artists.html', artists=data, page=data)
+
+async def show_artist(artist_id):
+  async with database.session() as s:
+    artist = (await s.execute(queries.artist_detail(artist_id))).unique().scalar_one_or_none()
+  if artist is None:
+    abort(404)
+  return render_template('pages/show_artist.html', artist=artist_page(artist))
+
+async def shows():
+  async with database.session() as s:
+    data = await queries.shows.paginate_async(s, request.args.get('cursor'))
+  return render_template('pages/shows.html', shows=data, page=data)
+
+# keyed by the endpoint of the sync view each one replaces
+ASYNC_VIEWS = {
+  'index': index,
+  'venues': venues,
+  'show_venue': show_venue,
+  'artists': artists,
+  'show_artist': show_artist,
+  'shows': shows
+}
+
+
+#  Dispatch
+#  ----------------------------------------------------------------
+
+async def validators(tables):
+  # conditional.validators on the async engine, shared the same way
+  known = g.setdefault('validators', {})
+  key = validators_key(tables)
+  if key not in known:
+    async with database.session() as s:
+      known[key] = make_validators((await s.execute(validators_statement(key))).all())
+  return known[key]
+
+async def cached(view, render):
+  # the sync view's @page_cache.cached tables, through the same cache
+  tables = getattr(view, 'cache_tables', None)
+  if tables is None or page_cache.backend is None or request.method != 'GET':
+    return await render()
+  etag, last_modified = await validators(tables)
+  return await page_cache.get_or_render_async(page_cache.make_key(), etag, render)
+
+async def dispatch():
+  # the sync view's @conditional tables, answered with 304 when unchanged
+  view = current_app.view_functions[request.endpoint]
+  handler = ASYNC_VIEWS[request.endpoint]
+  render = lambda: handler(**request.view_args)
+  tables = getattr(view, 'conditional_tables', None)
+  if tables is None or skips_validation():
+    return await cached(view, render)
+
+  etag, last_modified = await validators(tables)
+  if is_not_modified(etag, last_modified):
+    response = current_app.make_response(('', 304))
+  else:
+    response = current_app.make_response(await cached(view, render))
+  return add_validators(response, etag, last_modified)
+
+async def full_dispatch():
+  # Flask.full_dispatch_request and wsgi_app's error handling, with an
+  # awaited view
+  try:
+    try:
+      rv = current_app.preprocess_request()
+      if rv is None:
+        rv = await dispatch()
+    except Exception as e:
+      rv = current_app.handle_user_exception(e)
+    return current_app.finalize_request(rv)
+  except Exception as e:
+    return current_app.handle_exception(e)
+
+
+#  ASGI
+#  ----------------------------------------------------------------
+
+def wsgi_environ(scope):
+  # enough of a WSGI environ for Flask to build the request from
+  server = scope.get('server') or ('localhost', 80)
+  environ = {
+    'REQUEST_METHOD': scope['method'],
+    'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+    'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+    'QUERY_STRING': scope['query_string'].decode('latin-1'),
+    'SERVER_NAME': server[0],
+    'SERVER_PORT': str(server[1]),
+    'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+    'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+    'wsgi.version': (1, 0),
+    'wsgi.url_scheme': scope.get('scheme', 'http'),
+    'wsgi.input': io.BytesIO(),
+    'wsgi.errors': sys.stderr,
+    'wsgi.multithread': True,
+    'wsgi.multiprocess': True,
+    'wsgi.run_once': False
+  }
+  for name, value in scope['headers']:
+    name = name.decode('latin-1').upper().replace('-', '_')
+    key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+    value = value.decode('latin-1')
+    environ[key] = environ[key] + ',' + value if key in environ else value
+  return environ
+
+
+async def send_response(response, send, head=False):
+  await send({
+    'type': 'http.response.start',
+    'status': response.status_code,
+    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+  })
+  if not head:
+    for chunk in response.iter_encoded():
+      await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+  await send({'type': 'http.response.body', 'body': b''})
+  response.close()
+
+
+class AsyncReads:
+  # ASGI app answering GET and HEAD for ASYNC_VIEWS and handing every other
+  # request to fallback, the WSGI app wrapped for ASGI
+
+  def __init__(self, app, fallback):
+    self.app = app
+    self.fallback = fallback
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] == 'lifespan':
+      return await self.lifespan(receive, send)
+    if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+      return await self.fallback(scope, receive, send)
+
+    environ = wsgi_environ(scope)
+    try:
+      endpoint, view_args = self.app.url_map.bind_to_environ(environ).match()
+    except HTTPException:
+      endpoint = None
+    if endpoint not in ASYNC_VIEWS:
+      return await self.fallback(scope, receive, send)
+
+    with self.app.request_context(environ):
+      # flashed messages are shown, and cleared, by the sync views
+      if '_flashes' in session:
+        response = None
+      else:
+        response = await full_dispatch()
+    if response is None:
+      return await self.fallback(scope, receive, send)
+    await send_response(response, send, head=scope['method'] == 'HEAD')
+
+  async def lifespan(self, receive, send):
+    while True:
+      message = await receive()
+      if message['type'] == 'lifespan.startup':
+        await send({'type': 'lifespan.startup.complete'})
+      elif message['type'] == 'lifespan.shutdown':
+        await database.dispose()
+        await send({'type': 'lifespan.shutdown.complete'})
+        return
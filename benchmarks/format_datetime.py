@@ -0,0 +1,57 @@
+"""Per-call cost of the `datetime` Jinja filter, before and after caching.
+
+Run from the project root:
+
+    python -m benchmarks.format_datetime
+"""
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from filters import compile_format, format_datetime, format_datetime_cached
+
+
+def format_datetime_before(value, format='medium'):
+  # the filter as it was: parse a string, then let babel parse the pattern
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format, locale='en')
+
+
+def main(rows=2000, distinct=200, repeat=5):
+  # a /shows page worth of start times, with the repeats real listings have
+  rng = random.Random(0)
+  base = datetime(2026, 1, 1, 20, 0)
+  times = [base + timedelta(days=rng.randrange(distinct)) for _ in range(rows)]
+  strings = [str(t) for t in times]
+
+  for value, string in zip(times, strings):
+    assert format_datetime(value, 'full') == format_datetime_before(string, 'full')
+
+  def before():
+    for string in strings:
+      format_datetime_before(string, 'full')
+
+  def after_cold():
+    format_datetime_cached.cache_clear()
+    compile_format.cache_clear()
+    for value in times:
+      format_datetime(value, 'full')
+
+  def after_warm():
+    for value in times:
+      format_datetime(value, 'full')
+
+  for name, fn in (('before', before), ('after (cold cache)', after_cold), ('after (warm cache)', after_warm)):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print('%-20s %8.2f us/call' % (name, best / rows * 1e6))
+
+
+if __name__ == '__main__':
+  main()
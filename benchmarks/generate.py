@@ -0,0 +1,167 @@
+"""Deterministic synthetic catalogue for benchmarking.
+
+Fills the configured database with artists, venues and shows. A handful of
+venues and artists get most of the shows (a power law, like real listings),
+and a configurable share of the shows lies in the future. The same seed and
+volumes always produce the same rows, with their dates placed around the
+moment they are generated, as the app counts upcoming and past shows against
+the current time.
+
+Run from the project root, against a scratch database:
+
+    python -m benchmarks.generate --shows 100000 --reset
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from models import db, Artist, Venue, Show
+from importer import copy_rows, insert_rows
+from counters import reconcile
+
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+  'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+  'Rock n Roll', 'Soul', 'Other']
+CITIES = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Chicago', 'IL'),
+  ('Seattle', 'WA'), ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Denver', 'CO'), ('Boston', 'MA'),
+  ('Los Angeles', 'CA'), ('Portland', 'OR'), ('Atlanta', 'GA')]
+WORDS = ['Blue', 'Velvet', 'Electric', 'Midnight', 'Golden', 'Wild', 'Silver', 'Hollow', 'Neon',
+  'Crimson', 'Lucky', 'Lonesome', 'Broken', 'Sonic', 'Paper', 'Iron', 'Quiet', 'Royal']
+ARTIST_NOUNS = ['Band', 'Collective', 'Trio', 'Orchestra', 'Kids', 'Machine', 'Riders', 'Sisters', 'Project']
+VENUE_NOUNS = ['Hall', 'Lounge', 'Room', 'Tavern', 'Theatre', 'Club', 'Garden', 'Cellar', 'Stage']
+
+# with the default volumes a scale is named after its number of shows
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+
+
+def volumes(shows):
+  # artists and venues grow with the number of shows
+  return {'shows': shows, 'artists': max(20, shows // 20), 'venues': max(10, shows // 50)}
+
+
+def power_law_weights(count, exponent):
+  # cumulative weights where entity k gets a share proportional to 1/k^exponent
+  return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def profile(rng, nouns, index, now):
+  city, state = rng.choice(CITIES)
+  name = 'The %s %s %s %d' % (rng.choice(WORDS), rng.choice(WORDS), rng.choice(nouns), index)
+  return {
+    'name': name,
+    'city': city,
+    'state': state,
+    'phone': '%03d-%03d-%04d' % (rng.randrange(200, 999), rng.randrange(1000), rng.randrange(10000)),
+    'genres': rng.sample(GENRES, rng.randint(1, 3)),
+    'image_link': 'https://images.example.com/%d.jpg' % rng.randrange(10 ** 6),
+    'facebook_link': 'https://www.facebook.com/%d' % index,
+    'website_link': 'https://example.com/%d' % index,
+    'seeking_description': None,
+    'date_listed': now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+  }
+
+
+def artist_rows(rng, count, now):
+  for index in range(1, count + 1):
+    row = profile(rng, ARTIST_NOUNS, index, now)
+    row['seeking_venue'] = rng.random() < 0.3
+    yield row
+
+
+def venue_rows(rng, count, now):
+  for index in range(1, count + 1):
+    row = profile(rng, VENUE_NOUNS, index, now)
+    row['address'] = '%d %s Street' % (rng.randrange(1, 2000), rng.choice(WORDS))
+    row['seeking_talent'] = rng.random() < 0.3
+    yield row
+
+
+def show_rows(rng, count, venue_ids, artist_ids, now, upcoming, exponent):
+  venue_weights = power_law_weights(len(venue_ids), exponent)
+  artist_weights = power_law_weights(len(artist_ids), exponent)
+  # shuffled so the busiest venue is not simply the first one inserted
+  venue_ids = rng.sample(venue_ids, len(venue_ids))
+  artist_ids = rng.sample(artist_ids, len(artist_ids))
+  for _ in range(count):
+    if rng.random() < upcoming:
+      start_time = now + timedelta(minutes=rng.randrange(1, 180 * 24 * 60))
+    else:
+      start_time = now - timedelta(minutes=rng.randrange(1, 5 * 365 * 24 * 60))
+    yield {
+      'venue_id': rng.choices(venue_ids, cum_weights=venue_weights)[0],
+      'artist_id': rng.choices(artist_ids, cum_weights=artist_weights)[0],
+      'start_time': start_time.replace(second=0, microsecond=0)
+    }
+
+
+def write(model, rows, use_copy, batch_size):
+  write_rows = copy_rows if use_copy else insert_rows
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) == batch_size:
+      write_rows(model.__table__, batch)
+      db.session.commit()
+      batch = []
+  if batch:
+    write_rows(model.__table__, batch)
+    db.session.commit()
+
+
+def reset():
+  # shows first, they reference the other two
+  for model in (Show, Venue, Artist):
+    db.session.execute(model.__table__.delete())
+  db.session.commit()
+
+
+def generate(shows=1000, artists=None, venues=None, upcoming=0.2, exponent=1.1, seed=0,
+    now=None, batch_size=10000, use_copy=None):
+  # Returns the volumes written. Expects empty tables, see reset().
+  sizes = volumes(shows)
+  sizes.update({name: value for name, value in (('artists', artists), ('venues', venues)) if value})
+  rng = random.Random(seed)
+  now = now or datetime.now().replace(second=0, microsecond=0)
+  if use_copy is None:
+    use_copy = db.engine.dialect.name == 'postgresql'
+
+  write(Artist, artist_rows(rng, sizes['artists'], now), use_copy, batch_size)
+  write(Venue, venue_rows(rng, sizes['venues'], now), use_copy, batch_size)
+  artist_ids = list(db.session.execute(db.select(Artist.id).order_by(Artist.id)).scalars())
+  venue_ids = list(db.session.execute(db.select(Venue.id).order_by(Venue.id)).scalars())
+  write(Show, show_rows(rng, shows, venue_ids, artist_ids, now, upcoming, exponent), use_copy, batch_size)
+  # the rows above bypass the session events that keep the counters current
+  reconcile(now=now)
+  return sizes
+
+
+def catalogue_size():
+  return {name: db.session.execute(db.select(db.func.count()).select_from(model)).scalar()
+    for name, model in (('artists', Artist), ('venues', Venue), ('shows', Show))}
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--shows', type=int, default=1000)
+  parser.add_argument('--artists', type=int, help='default: one per 20 shows')
+  parser.add_argument('--venues', type=int, help='default: one per 50 shows')
+  parser.add_argument('--upcoming', type=float, default=0.2, help='share of shows in the future')
+  parser.add_argument('--exponent', type=float, default=1.1, help='power-law exponent of shows per venue and artist')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--reset', action='store_true', help='delete every artist, venue and show first')
+  args = parser.parse_args(argv)
+
+  from app import create_app
+  app = create_app()
+  with app.app_context():
+    if args.reset:
+      reset()
+    elif any(catalogue_size().values()):
+      parser.error('the database already holds a catalogue; pass --reset to replace it')
+    sizes = generate(args.shows, args.artists, args.venues, args.upcoming, args.exponent, args.seed)
+    print('Generated %(artists)d artists, %(venues)d venues and %(shows)d shows.' % sizes)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,220 @@
+"""Latency, queries and memory of every page and API route, at several scales.
+
+For each scale the catalogue is regenerated with benchmarks.generate, then
+every read route, and the venue and show create forms, is driven through the
+Flask test client. The report lists p50/p95/p99 latency, SQL statements per
+request and peak Python memory per route, and is saved as JSON under
+benchmarks/results/ so runs on different commits can be compared.
+
+Run from the project root, against a scratch database (it is wiped):
+
+    python -m benchmarks.routes --scales 1k,100k,1m --reset
+    python -m benchmarks.routes --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from benchmarks.generate import SCALES, catalogue_size, generate, reset
+from models import db, Artist, Venue, Show
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def percentile(values, fraction):
+  values = sorted(values)
+  return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def routes(rng, now):
+  # (name, method, path, form data); detail pages are measured on the
+  # busiest venue and artist as well as on typical ones. The writes come
+  # last, since every one of them invalidates the cached pages.
+  busiest_venue = db.session.execute(db.select(Venue.id).order_by(Venue.upcoming_shows_count.desc(),
+    Venue.past_shows_count.desc()).limit(1)).scalar()
+  busiest_artist = db.session.execute(db.select(Artist.id).order_by(Artist.upcoming_shows_count.desc(),
+    Artist.past_shows_count.desc()).limit(1)).scalar()
+  venue_ids = list(db.session.execute(db.select(Venue.id)).scalars())
+  artist_ids = list(db.session.execute(db.select(Artist.id)).scalars())
+  show_id = db.session.execute(db.select(db.func.max(Show.id))).scalar()
+  venue_id, artist_id = rng.choice(venue_ids), rng.choice(artist_ids)
+  return [
+    ('index', 'GET', '/', None),
+    ('venues', 'GET', '/venues', None),
+    ('show_venue (busiest)', 'GET', '/venues/%d' % busiest_venue, None),
+    ('show_venue', 'GET', '/venues/%d' % venue_id, None),
+    ('search_venues', 'POST', '/venues/search', {'search_term': 'blue hall'}),
+    ('create_venue_form', 'GET', '/venues/create', None),
+    ('edit_venue', 'GET', '/venues/%d/edit' % venue_id, None),
+    ('artists', 'GET', '/artists', None),
+    ('show_artist (busiest)', 'GET', '/artists/%d' % busiest_artist, None),
+    ('show_artist', 'GET', '/artists/%d' % artist_id, None),
+    ('search_artists', 'POST', '/artists/search', {'search_term': 'the band'}),
+    ('create_artist_form', 'GET', '/artists/create', None),
+    ('edit_artist', 'GET', '/artists/%d/edit' % artist_id, None),
+    ('shows', 'GET', '/shows', None),
+    ('create_shows', 'GET', '/shows/create', None),
+    ('api.list_artists', 'GET', '/api/v1/artists?per_page=100', None),
+    ('api.list_venues', 'GET', '/api/v1/venues?per_page=100', None),
+    ('api.list_shows', 'GET', '/api/v1/shows?per_page=100', None),
+    ('api.get_show', 'GET', '/api/v1/shows/%d' % show_id, None),
+    ('api.search_artists', 'GET', '/api/v1/artists/search?q=the+band', None),
+    ('create_venue', 'POST', '/venues/create', {
+      'name': 'Benchmark Hall', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Market St',
+      'phone': '415-555-0100', 'genres': ['Jazz', 'Blues'], 'facebook_link': 'https://www.facebook.com/benchmark'}),
+    ('create_show', 'POST', '/shows/create', {
+      'artist_id': str(artist_id), 'venue_id': str(venue_id),
+      'start_time': (now + timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')})
+  ]
+
+
+class StatementCounter:
+
+  def __init__(self, engine):
+    self.count = 0
+    event.listen(engine, 'before_cursor_execute', self.record)
+
+  def record(self, *args):
+    self.count += 1
+
+
+def request(client, method, path, data):
+  response = client.open(path, method=method, data=data)
+  # streamed responses only run their queries while being read
+  response.get_data()
+  if response.status_code >= 400:
+    raise RuntimeError('%s %s answered %d' % (method, path, response.status_code))
+
+
+def measure(client, counter, route, requests, warmup):
+  name, method, path, data = route
+  for _ in range(warmup):
+    request(client, method, path, data)
+
+  latencies = []
+  queries = []
+  for _ in range(requests):
+    before = counter.count
+    started = time.perf_counter()
+    request(client, method, path, data)
+    latencies.append(time.perf_counter() - started)
+    queries.append(counter.count - before)
+
+  # a separate pass, tracing slows every allocation down
+  tracemalloc.start()
+  request(client, method, path, data)
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+
+  return {
+    'method': method,
+    'path': path,
+    'requests': requests,
+    'p50_ms': percentile(latencies, 0.50) * 1000,
+    'p95_ms': percentile(latencies, 0.95) * 1000,
+    'p99_ms': percentile(latencies, 0.99) * 1000,
+    'queries_per_request': sum(queries) / len(queries),
+    'peak_memory_kb': peak / 1024
+  }
+
+
+def git_commit():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def run(app, scales, requests, warmup, use_cache, seed):
+  if not use_cache:
+    # measure the views themselves, not rendered-page cache hits
+    app.extensions['page_cache'].backend = None
+  client = app.test_client()
+  results = {
+    'commit': git_commit(),
+    'created': datetime.now().isoformat(timespec='seconds'),
+    'python': platform.python_version(),
+    'database': db.engine.dialect.name,
+    'page_cache': use_cache,
+    'scales': {}
+  }
+  counter = StatementCounter(db.engine)
+  for scale in scales:
+    reset()
+    # the app counts upcoming shows against the current time, so the
+    # catalogue is placed around it too
+    now = datetime.now().replace(second=0, microsecond=0)
+    generate(SCALES[scale], seed=seed, now=now)
+    app.extensions['search_index'].build()
+    sizes = catalogue_size()
+    print('\n%s: %d artists, %d venues, %d shows' % (scale, sizes['artists'], sizes['venues'], sizes['shows']))
+    print('%-24s %9s %9s %9s %8s %10s' % ('route', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'peak KiB'))
+    measured = {}
+    for route in routes(random.Random(seed), now):
+      stats = measured[route[0]] = measure(client, counter, route, requests, warmup)
+      db.session.remove()
+      print('%-24s %9.2f %9.2f %9.2f %8.1f %10.0f' % (route[0], stats['p50_ms'], stats['p95_ms'],
+        stats['p99_ms'], stats['queries_per_request'], stats['peak_memory_kb']))
+    results['scales'][scale] = {'now': now.isoformat(), 'catalogue': sizes, 'routes': measured}
+  return results
+
+
+def compare(current, baseline):
+  # p95 and queries per request of this run against an earlier one
+  print('\nCompared with %s (%s):' % (baseline.get('commit'), baseline.get('created')))
+  print('%-6s %-24s %18s %14s' % ('scale', 'route', 'p95 ms', 'queries'))
+  for scale, measured in current['scales'].items():
+    before = baseline['scales'].get(scale, {}).get('routes', {})
+    for name, stats in measured['routes'].items():
+      if name in before:
+        print('%-6s %-24s %8.2f -> %7.2f %6.1f -> %5.1f' % (scale, name, before[name]['p95_ms'],
+          stats['p95_ms'], before[name]['queries_per_request'], stats['queries_per_request']))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--scales', default='1k', help='comma separated, from %s' % ', '.join(SCALES))
+  parser.add_argument('--requests', type=int, default=50, help='measured requests per route')
+  parser.add_argument('--warmup', type=int, default=3, help='unmeasured requests per route')
+  parser.add_argument('--cache', action='store_true', help='leave the rendered-page cache on')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--reset', action='store_true', help='allow wiping the configured database')
+  parser.add_argument('--output', help='JSON file to write; a new file under benchmarks/results/ by default')
+  parser.add_argument('--compare', help='earlier JSON results to compare against')
+  args = parser.parse_args(argv)
+  scales = [scale.strip().lower() for scale in args.scales.split(',') if scale.strip()]
+  unknown = [scale for scale in scales if scale not in SCALES]
+  if unknown:
+    parser.error('unknown scales: %s' % ', '.join(unknown))
+
+  from app import create_app
+  app = create_app()
+  with app.app_context():
+    if not args.reset and any(catalogue_size().values()):
+      parser.error('the benchmark replaces the catalogue in the configured database; pass --reset to allow it')
+    results = run(app, scales, args.requests, args.warmup, args.cache, args.seed)
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, '%s-%s.json' % (
+      datetime.now().strftime('%Y%m%d-%H%M%S'), results['commit'] or 'unknown'))
+  with open(output, 'w') as f:
+    json.dump(results, f, indent=2, sort_keys=True)
+  print('\nSaved %s' % output)
+
+  if args.compare:
+    with open(args.compare) as f:
+      compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,102 @@
+"""Cold-start cost of an entry point: import time and time to first response.
+
+Each run starts a fresh interpreter with -X importtime, imports the entry
+point (wsgi by default), then requests one page through the test client.
+The report shows the median import time, the packages that cost the most
+and the time to the first response. With a budget set, a run over budget
+exits with status 1, so CI can catch an import that slows startup down.
+
+Run from the project root:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --entry asgi --budget-ms 400 --first-request-budget-ms 600
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# imports the entry point, then times one request on its WSGI app
+CHILD = '''
+import sys, time, json
+started = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter()
+app = getattr(module, 'wsgi_app', None) or module.app
+status = app.test_client().get(sys.argv[2]).status_code
+print(json.dumps({'import': imported - started, 'first_response': time.perf_counter() - started, 'status': status}))
+'''
+
+
+def parse_importtime(stderr):
+  # (module, self microseconds, cumulative microseconds) per imported module
+  modules = []
+  for line in stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    self_us, cumulative_us, name = line[len('import time:'):].split('|')
+    modules.append((name.strip(), int(self_us), int(cumulative_us)))
+  return modules
+
+
+def run_once(entry, path):
+  # the entry points refuse to start without a SECRET_KEY
+  env = dict(os.environ, SECRET_KEY=os.getenv('SECRET_KEY') or 'startup-benchmark')
+  result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, entry, path],
+    cwd=ROOT, capture_output=True, text=True, env=env)
+  if result.returncode != 0:
+    raise RuntimeError('importing %s failed:\n%s' % (entry, result.stderr[-2000:]))
+  timings = json.loads(result.stdout.strip().splitlines()[-1])
+  return timings, parse_importtime(result.stderr)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--entry', default='wsgi', help='module to import, e.g. wsgi or asgi')
+  parser.add_argument('--path', default='/venues/create', help='page requested after the import')
+  parser.add_argument('--runs', type=int, default=5)
+  parser.add_argument('--top', type=int, default=15, help='packages to list')
+  parser.add_argument('--budget-ms', type=float, help='fail when the median import takes longer')
+  parser.add_argument('--first-request-budget-ms', type=float,
+    help='fail when the median time to the first response is longer')
+  args = parser.parse_args(argv)
+
+  imports, responses = [], []
+  package_time = defaultdict(list)
+  for _ in range(args.runs):
+    timings, modules = run_once(args.entry, args.path)
+    imports.append(timings['import'] * 1000)
+    responses.append(timings['first_response'] * 1000)
+    totals = defaultdict(int)
+    for name, self_us, cumulative_us in modules:
+      totals[name.split('.')[0]] += self_us
+    for package, total in totals.items():
+      package_time[package].append(total / 1000)
+
+  import_ms = statistics.median(imports)
+  response_ms = statistics.median(responses)
+  print('%s, median of %d runs' % (args.entry, args.runs))
+  print('  import          %8.1f ms' % import_ms)
+  print('  first response  %8.1f ms  (GET %s, HTTP %d)' % (response_ms, args.path, timings['status']))
+  print('\nSlowest packages to import (own time, median ms):')
+  slowest = sorted(((statistics.median(times), package) for package, times in package_time.items()), reverse=True)
+  for ms, package in slowest[:args.top]:
+    print('  %-30s %8.1f' % (package, ms))
+
+  over = []
+  if args.budget_ms is not None and import_ms > args.budget_ms:
+    over.append('import took %.1f ms, over the %.1f ms budget' % (import_ms, args.budget_ms))
+  if args.first_request_budget_ms is not None and response_ms > args.first_request_budget_ms:
+    over.append('first response took %.1f ms, over the %.1f ms budget' % (response_ms, args.first_request_budget_ms))
+  for message in over:
+    print('\nOver budget: ' + message, file=sys.stderr)
+  return 1 if over else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
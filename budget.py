@@ -0,0 +1,90 @@
+import os
+import traceback
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Per-view query budgets.
+#----------------------------------------------------------------------------#
+
+# Views declare how many SQL statements a request may run with
+# @query_budget(n). With QUERY_BUDGET_MODE set to 'log' or 'raise', every
+# statement of a budgeted request is recorded with the stack that issued it,
+# and a request that goes over budget is logged or fails, so an N+1 lookup
+# added to a view or template shows up in CI instead of in production.
+
+MODES = ('log', 'raise')
+
+# frames from these files say nothing about where a query came from
+SKIPPED_PATHS = ('site-packages', os.sep + 'lib' + os.sep + 'python', __file__)
+
+
+class QueryBudgetExceeded(Exception):
+  pass
+
+
+def query_budget(max_queries):
+  def decorator(view):
+    view.query_budget = max_queries
+    return view
+  return decorator
+
+
+def view_budget():
+  view = current_app.view_functions.get(request.endpoint)
+  return getattr(view, 'query_budget', None)
+
+
+def issuing_frames():
+  stack = traceback.extract_stack()[:-2]
+  return traceback.format_list([frame for frame in stack if not any(path in frame.filename for path in SKIPPED_PATHS)])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+  if not has_request_context() or g.get('query_log') is None:
+    return
+  # session settings such as the statement timeout are not queries
+  if statement.lstrip().upper().startswith('SET '):
+    return
+  g.query_log.append((statement, issuing_frames()))
+
+
+def report(endpoint, budget, query_log):
+  lines = ['%s ran %d SQL statements, over its budget of %d.' % (endpoint, len(query_log), budget)]
+  repeated = [(statement, count) for statement, count in Counter(s for s, frames in query_log).most_common() if count > 1]
+  for statement, count in repeated:
+    lines.append('Repeated %d times: %s' % (count, ' '.join(statement.split())))
+  for number, (statement, frames) in enumerate(query_log, 1):
+    lines.append('')
+    lines.append('#%d %s' % (number, ' '.join(statement.split())))
+    lines.append(''.join(frames).rstrip())
+  return '\n'.join(lines)
+
+
+def init_app(app):
+  mode = app.config.get('QUERY_BUDGET_MODE')
+  if not mode:
+    return
+  if mode not in MODES:
+    raise ValueError('QUERY_BUDGET_MODE must be one of %s, not %r' % (', '.join(MODES), mode))
+
+  @app.before_request
+  def start_query_log():
+    if view_budget() is not None:
+      g.query_log = []
+
+  @app.after_request
+  def check_query_budget(response):
+    query_log = g.pop('query_log', None)
+    budget = view_budget()
+    if query_log is None or len(query_log) <= budget:
+      return response
+    message = report(request.endpoint, budget, query_log)
+    if mode == 'raise':
+      raise QueryBudgetExceeded(message)
+    app.logger.warning(message)
+    return response
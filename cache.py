@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request, session
+
+from conditional import validators
+
+#----------------------------------------------------------------------------#
+# Rendered-page cache.
+#----------------------------------------------------------------------------#
+
+# Cached pages carry the validators (see conditional.py) of the tables they
+# were rendered from. Those come from the write_versions table, shared by
+# every worker, so a write committed anywhere turns the pages that read its
+# table into misses. Inside a @conditional view this is the same lookup the
+# ETag is made from, so a page is never served under another page's ETag.
+
+class LRUBackend:
+  # bounded in-process store, evicting the least recently used page
+
+  def __init__(self, max_entries=1000):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.locks = set()
+    self.mutex = threading.Lock()
+
+  def get(self, key):
+    with self.mutex:
+      entry = self.entries.get(key)
+      if entry is not None:
+        self.entries.move_to_end(key)
+      return entry
+
+  def set(self, key, entry):
+    with self.mutex:
+      self.entries[key] = entry
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+  def acquire(self, key):
+    with self.mutex:
+      if key in self.locks:
+        return False
+      self.locks.add(key)
+      return True
+
+  def release(self, key):
+    with self.mutex:
+      self.locks.discard(key)
+
+
+class FileSystemBackend:
+  # pages shared by every worker through a directory. Entries are stored as
+  # JSON, so a file another user can write to yields at worst a wrong page,
+  # never code run on load.
+
+  def __init__(self, directory, max_entries=10000, lock_timeout=30):
+    self.directory = directory
+    self.max_entries = max_entries
+    self.lock_timeout = lock_timeout
+    self.writes = 0
+    for sub in ('pages', 'locks'):
+      os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+  def path(self, kind, name):
+    return os.path.join(self.directory, kind, hashlib.sha1(name.encode()).hexdigest())
+
+  def write(self, path, data):
+    # write to a temporary file first so readers never see a partial page
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+      f.write(data)
+    os.replace(tmp, path)
+
+  def get(self, key):
+    try:
+      with open(self.path('pages', key), 'rb') as f:
+        return json.loads(f.read())
+    except (OSError, ValueError):
+      return None
+
+  def set(self, key, entry):
+    # entries hold the rendered page as text, its version and a timestamp
+    self.write(self.path('pages', key), json.dumps(entry).encode())
+    self.writes += 1
+    if self.writes % 100 == 0:
+      self.cull()
+
+  def cull(self):
+    pages = os.path.join(self.directory, 'pages')
+    names = os.listdir(pages)
+    if len(names) <= self.max_entries:
+      return
+    paths = sorted((os.path.join(pages, name) for name in names), key=os.path.getmtime)
+    for path in paths[:len(paths) - self.max_entries]:
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+
+  def acquire(self, key):
+    path = self.path('locks', key)
+    try:
+      # a lock left behind by a crashed worker expires after lock_timeout
+      if time.time() - os.path.getmtime(path) > self.lock_timeout:
+        os.remove(path)
+    except OSError:
+      pass
+    try:
+      os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+      return True
+    except FileExistsError:
+      return False
+
+  def release(self, key):
+    try:
+      os.remove(self.path('locks', key))
+    except OSError:
+      pass
+
+
+class PageCache:
+  # Caches the rendered responses of GET views. Pages are fresh for
+  # PAGE_CACHE_TTL seconds; for PAGE_CACHE_STALE_TTL seconds after that one
+  # request regenerates the page while the others keep serving the stale one.
+
+  def __init__(self, app=None):
+    self.backend = None
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    backend = app.config.get('PAGE_CACHE_BACKEND')
+    max_entries = app.config.get('PAGE_CACHE_MAX_ENTRIES', 1000)
+    if backend == 'lru':
+      self.backend = LRUBackend(max_entries)
+    elif backend == 'filesystem':
+      self.backend = FileSystemBackend(app.config['PAGE_CACHE_DIR'], max_entries)
+    elif backend:
+      raise ValueError('Unknown PAGE_CACHE_BACKEND %r' % backend)
+    self.ttl = app.config.get('PAGE_CACHE_TTL', 60)
+    self.stale_ttl = app.config.get('PAGE_CACHE_STALE_TTL', 300)
+    self.lock_wait = app.config.get('PAGE_CACHE_LOCK_WAIT', 5)
+    app.extensions['page_cache'] = self
+
+  def cached(self, *tables):
+    # tables are those the page is rendered from, as for @conditional
+    def decorator(view):
+      @wraps(view)
+      def wrapper(**kwargs):
+        # pages showing a flashed message are specific to one visitor
+        if self.backend is None or request.method != 'GET' or '_flashes' in session:
+          return view(**kwargs)
+        etag, last_modified = validators(tables)
+        return self.get_or_render(self.make_key(), etag, lambda: view(**kwargs))
+      # read by the async views, which share the cache with these views
+      wrapper.cache_tables = tables
+      return wrapper
+    return decorator
+
+  def make_key(self):
+    return request.path + '?' + '&'.join(sorted('%s=%s' % item for item in request.args.items(multi=True)))
+
+  def lookup(self, key, version):
+    # returns the cached entry with its age, or None once its tables changed
+    entry = self.backend.get(key)
+    if entry is None or entry['version'] != version:
+      return None, None
+    return entry, time.time() - entry['created']
+
+  def get_or_render(self, key, version, render):
+    entry, age = self.lookup(key, version)
+    if entry is not None and age <= self.ttl:
+      return self.to_response(entry)
+
+    if not self.backend.acquire(key):
+      if entry is not None and age <= self.ttl + self.stale_ttl:
+        return self.to_response(entry)
+      # another request is rendering this page; wait for it rather than
+      # rendering the same page concurrently
+      deadline = time.monotonic() + self.lock_wait
+      while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry, age = self.lookup(key, version)
+        if entry is not None and age <= self.ttl:
+          return self.to_response(entry)
+      return render()
+
+    try:
+      # version was read before rendering, so a write landing mid-render
+      # leaves the stored page already invalid
+      response = render()
+      if not isinstance(response, str):
+        return response
+      self.backend.set(key, {
+        'body': response,
+        'version': version,
+        'created': time.time()
+      })
+      return response
+    finally:
+      self.backend.release(key)
+
+  async def get_or_render_async(self, key, version, render):
+    # get_or_render for the async views; render is a coroutine function
+    entry, age = self.lookup(key, version)
+    if entry is not None and age <= self.ttl:
+      return self.to_response(entry)
+
+    if not self.backend.acquire(key):
+      if entry is not None and age <= self.ttl + self.stale_ttl:
+        return self.to_response(entry)
+      deadline = time.monotonic() + self.lock_wait
+      while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        entry, age = self.lookup(key, version)
+        if entry is not None and age <= self.ttl:
+          return self.to_response(entry)
+      return await render()
+
+    try:
+      response = await render()
+      if not isinstance(response, str):
+        return response
+      self.backend.set(key, {
+        'body': response,
+        'version': version,
+        'created': time.time()
+      })
+      return response
+    finally:
+      self.backend.release(key)
+
+  def to_response(self, entry):
+    response = Response(entry['body'], mimetype='text/html')
+    response.headers['X-Cache'] = 'HIT'
+    return response
@@ -0,0 +1,150 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, make_response, request, session
+from sqlalchemy import event, orm
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Show, WriteVersion
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+
+# Every commit bumps the write_versions row of each table it wrote to. Pages
+# derive their ETag and Last-Modified from the rows of the tables they read,
+# so a repeat visit is answered with 304 after a single primary key lookup.
+
+WRITTEN_TABLES = 'written_tables'
+versions_table = WriteVersion.__table__
+UPSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def record_written(session, name):
+  if name != versions_table.name:
+    session.info.setdefault(WRITTEN_TABLES, set()).add(name)
+
+
+@event.listens_for(orm.Session, 'after_flush')
+def record_flushed_tables(session, flush_context):
+  for obj in session.new | session.deleted:
+    record_written(session, obj.__table__.name)
+  for obj in session.dirty:
+    if session.is_modified(obj):
+      record_written(session, obj.__table__.name)
+
+
+@event.listens_for(orm.Session, 'do_orm_execute')
+def record_bulk_writes(orm_execute_state):
+  # Query.update() and session.execute(update(...)) never reach the flush
+  if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+    return
+  result = orm_execute_state.invoke_statement()
+  if orm_execute_state.is_insert or result.rowcount:
+    record_written(orm_execute_state.session, orm_execute_state.statement.table.name)
+  return result
+
+
+@event.listens_for(orm.Session, 'before_commit')
+def bump_write_versions(session):
+  session.flush()
+  names = session.info.pop(WRITTEN_TABLES, None)
+  if not names:
+    return
+  now = datetime.now(timezone.utc).replace(tzinfo=None)
+  # one statement, so two first writes to a table cannot both insert its
+  # row; sorted, so concurrent commits lock the rows in the same order
+  insert = UPSERTS[session.get_bind().dialect.name](versions_table)
+  session.execute(
+    insert.values([{'name': name, 'version': 1, 'updated_at': now} for name in sorted(names)])
+      .on_conflict_do_update(index_elements=[versions_table.c.name],
+        set_={'version': versions_table.c.version + 1, 'updated_at': insert.excluded.updated_at})
+  )
+
+
+@event.listens_for(orm.Session, 'after_rollback')
+def forget_written_tables(session):
+  session.info.pop(WRITTEN_TABLES, None)
+
+
+def validators_key(tables):
+  return tuple(sorted(set(tables)))
+
+
+def validators_statement(tables):
+  # Shows move from upcoming to past as time passes, without any write, so
+  # pages reading shows also depend on when the latest show started.
+  if Show.__tablename__ in tables:
+    last_start = db.select(db.func.max(Show.start_time)).where(Show.start_time <= datetime.now()).scalar_subquery()
+  else:
+    last_start = db.null()
+  return db.select(versions_table.c.name, versions_table.c.version, versions_table.c.updated_at,
+      last_start.label('last_start')) \
+    .where(versions_table.c.name.in_(tables)) \
+    .order_by(versions_table.c.name)
+
+
+def make_validators(rows):
+  last_start = rows[0].last_start if rows else None
+  state = request.full_path + '|' + '|'.join('%s:%s' % (row.name, row.version) for row in rows) + \
+    '|%s' % last_start
+  etag = hashlib.sha1(state.encode()).hexdigest()
+  last_modified = None
+  if rows:
+    changes = [row.updated_at.replace(tzinfo=timezone.utc) for row in rows]
+    if last_start is not None:
+      # show times are naive local times
+      changes.append(last_start.astimezone(timezone.utc))
+    last_modified = max(changes).replace(microsecond=0)
+  return etag, last_modified
+
+
+def validators(tables):
+  # read once per request and set of tables: @conditional and the page cache
+  # (cache.py) both use them
+  known = g.setdefault('validators', {})
+  key = validators_key(tables)
+  if key not in known:
+    known[key] = make_validators(db.session.execute(validators_statement(key)).all())
+  return known[key]
+
+
+def skips_validation():
+  # a page showing a flashed message must not be revalidated later
+  return request.method not in ('GET', 'HEAD') or '_flashes' in session
+
+
+def is_not_modified(etag, last_modified):
+  if request.if_none_match:
+    return request.if_none_match.contains(etag)
+  since = request.if_modified_since
+  return since is not None and last_modified is not None and last_modified <= since
+
+
+def add_validators(response, etag, last_modified):
+  response.set_etag(etag)
+  if last_modified is not None:
+    response.last_modified = last_modified
+  response.cache_control.no_cache = True
+  return response
+
+
+def conditional(*tables):
+  # answers If-None-Match / If-Modified-Since with 304 before running the view
+  def decorator(view):
+    @wraps(view)
+    def wrapper(**kwargs):
+      if skips_validation():
+        return view(**kwargs)
+
+      etag, last_modified = validators(tables)
+      if is_not_modified(etag, last_modified):
+        response = make_response('', 304)
+      else:
+        response = make_response(view(**kwargs))
+      return add_validators(response, etag, last_modified)
+    # read by the async views, which validate the same tables
+    wrapper.conditional_tables = tables
+    return wrapper
+  return decorator
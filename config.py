@@ -1,5 +1,9 @@
 import os
-SECRET_KEY = os.urandom(32)
+import tempfile
+# Signs the session cookie. gunicorn.conf.py, wsgi.py and asgi.py refuse to
+# start without it, since workers that each generated a key would reject each
+# other's sessions; the development server generates one per process.
+SECRET_KEY = os.getenv("SECRET_KEY")
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -9,6 +13,11 @@ DEBUG = True
 # Stop SQLAlchemy warnings on console
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Compiled Jinja templates are cached here across restarts; an empty value
+# turns the cache off, and so does a directory that cannot be written to.
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR",
+  os.path.join(tempfile.gettempdir(), 'fyyur-jinja-cache'))
+
 # Connect to the database
 
 DB_NAME = os.getenv("DB_NAME", 'fyyur')
@@ -19,3 +28,85 @@ DB_PORT = os.getenv("DB_PORT", '5432')
 #IMPLEMENT DATABASE URL
 SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Connection pool, per worker process. Size it so that workers x
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under the server's max_connections;
+# /_status/pool reports how long checkouts wait.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': int(os.getenv("DB_POOL_SIZE", 5)),
+    'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    'pool_timeout': int(os.getenv("DB_POOL_TIMEOUT", 30)),
+    'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    'pool_pre_ping': os.getenv("DB_POOL_PRE_PING", 'true').lower() == 'true',
+}
+
+# Optional read replica. When set, GET requests read from it, and a client
+# that just wrote reads from the primary for READ_YOUR_WRITES_SECONDS.
+REPLICA_DATABASE_URI = os.getenv("REPLICA_DATABASE_URI", '')
+SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URI} if REPLICA_DATABASE_URI else {}
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+
+# Database the async views in asgi.py read from; by default the database
+# above through the async psycopg driver.
+ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI", '')
+
+# Longest any single statement may run during a request, in milliseconds;
+# views can set their own budget with engine.statement_timeout.
+STATEMENT_TIMEOUT_MS = int(os.getenv("STATEMENT_TIMEOUT_MS", 5000))
+
+# Checks views against the SQL statement budget set with budget.query_budget:
+# 'log' warns about requests over budget, 'raise' fails them (for tests and
+# CI), and an empty value turns the check off.
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", '')
+
+
+# Seconds before the in-memory search index is rebuilt from the database,
+# picking up writes made by other worker processes.
+SEARCH_INDEX_REFRESH = int(os.getenv("SEARCH_INDEX_REFRESH", 300))
+
+# Rows per page on the venue, artist and show listings; clients may ask for
+# up to MAX_PAGE_SIZE with ?per_page=.
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+
+# Rendered-page cache for the listing and detail pages: 'lru' keeps pages in
+# each worker's memory, 'filesystem' shares them between workers through
+# PAGE_CACHE_DIR, and an empty value turns caching off. Either way a page is
+# only served while the write_versions of the tables it reads are unchanged,
+# so a write made in one worker is seen by all of them.
+PAGE_CACHE_BACKEND = os.getenv("PAGE_CACHE_BACKEND", 'lru')
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), 'fyyur-page-cache'))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", 1000))
+# Seconds a page is served as fresh, then served stale while one request
+# regenerates it.
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 60))
+PAGE_CACHE_STALE_TTL = int(os.getenv("PAGE_CACHE_STALE_TTL", 300))
+# Seconds a request waits for another one rendering the same page before
+# rendering it too.
+PAGE_CACHE_LOCK_WAIT = float(os.getenv("PAGE_CACHE_LOCK_WAIT", 5))
+
+# Rows per page of the JSON API list endpoints; list responses are streamed,
+# so large pages do not grow worker memory.
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 100))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 10000))
+
+# Bearer token for the /exports download endpoint, which stays disabled
+# while this is empty.
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN", '')
+
+# Structured request and error log, written as JSON lines by a background
+# thread when DEBUG is off. LOG_ROTATE is 'size' (LOG_MAX_BYTES per file) or
+# a time interval such as 'midnight' or 'H'. With several gunicorn workers,
+# put {pid} in LOG_FILE so each worker rotates its own file.
+LOG_FILE = os.getenv("LOG_FILE", 'fyyur.log')
+LOG_ROTATE = os.getenv("LOG_ROTATE", 'size')
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+# Share of INFO records kept, e.g. 0.1 for one request log in ten; slow
+# requests (LOG_SLOW_REQUEST_MS) and errors are logged as warnings and always
+# kept.
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", 1.0))
+LOG_SLOW_REQUEST_MS = int(os.getenv("LOG_SLOW_REQUEST_MS", 1000))
+
+# Bearer token for the /bulk/<venues|artists>/delete endpoint, which stays
+# disabled while this is empty.
+BULK_DELETE_TOKEN = os.getenv("BULK_DELETE_TOKEN", '')
@@ -0,0 +1,162 @@
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, inspect
+
+from models import db, Artist, Venue, Show
+
+#----------------------------------------------------------------------------#
+# Denormalized show counters on venues and artists.
+#----------------------------------------------------------------------------#
+
+# every counted model with the column that links its shows to it
+COUNTED = ((Venue, 'venue_id'), (Artist, 'artist_id'))
+
+shows_table = Show.__table__
+
+
+def next_show_time(table, show_fk, now):
+  return db.select(db.func.min(shows_table.c.start_time)) \
+    .where(shows_table.c[show_fk] == table.c.id, shows_table.c.start_time > now) \
+    .scalar_subquery()
+
+
+def count_shows(table, show_fk, condition):
+  return db.select(db.func.count(shows_table.c.id)) \
+    .where(shows_table.c[show_fk] == table.c.id, condition) \
+    .scalar_subquery()
+
+
+def recompute(table, show_fk, now):
+  # counter values for an UPDATE of table, computed from the shows themselves
+  return {
+    'upcoming_shows_count': count_shows(table, show_fk, shows_table.c.start_time > now),
+    'past_shows_count': count_shows(table, show_fk, shows_table.c.start_time <= now),
+    'next_show_time': next_show_time(table, show_fk, now)
+  }
+
+
+def bump(connection, table, show_fk, entity_id, start_time, delta, now):
+  if start_time > now:
+    values = {'upcoming_shows_count': table.c.upcoming_shows_count + delta}
+    if delta > 0:
+      values['next_show_time'] = db.case(
+        (db.or_(table.c.next_show_time.is_(None), table.c.next_show_time > start_time), start_time),
+        else_=table.c.next_show_time
+      )
+    else:
+      values['next_show_time'] = next_show_time(table, show_fk, now)
+  else:
+    values = {'past_shows_count': table.c.past_shows_count + delta}
+  connection.execute(table.update().where(table.c.id == entity_id).values(values))
+
+
+#  Session events
+#  ----------------------------------------------------------------
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, show):
+  now = datetime.now()
+  for model, show_fk in COUNTED:
+    bump(connection, model.__table__, show_fk, getattr(show, show_fk), show.start_time, 1, now)
+
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, show):
+  now = datetime.now()
+  for model, show_fk in COUNTED:
+    bump(connection, model.__table__, show_fk, getattr(show, show_fk), show.start_time, -1, now)
+
+
+@event.listens_for(Show, 'after_update')
+def count_updated_show(mapper, connection, show):
+  # a moved or rescheduled show is recounted on both its old and new owners;
+  # the old ones are in the history thanks to the models' active_history
+  state = inspect(show)
+  if not any(state.attrs[name].history.has_changes() for name in ('venue_id', 'artist_id', 'start_time')):
+    return
+  now = datetime.now()
+  for model, show_fk in COUNTED:
+    history = state.attrs[show_fk].history
+    entity_ids = set(history.deleted or ()) | {getattr(show, show_fk)}
+    table = model.__table__
+    connection.execute(
+      table.update().where(table.c.id.in_(entity_ids)).values(recompute(table, show_fk, now))
+    )
+
+
+#  Bulk maintenance
+#  ----------------------------------------------------------------
+
+def roll_forward(table, show_fk, now):
+  # Like recompute, but shows that left the upcoming count are added to the
+  # past one instead of counting every past show again, so only shows after
+  # now are read (the current and future partitions of shows).
+  upcoming = count_shows(table, show_fk, shows_table.c.start_time > now)
+  return {
+    'upcoming_shows_count': upcoming,
+    'past_shows_count': table.c.past_shows_count + table.c.upcoming_shows_count - upcoming,
+    'next_show_time': next_show_time(table, show_fk, now)
+  }
+
+
+def rollover(now=None):
+  # Moves shows that started since the last run from upcoming to past. Only
+  # rows whose next show has already begun can have changed.
+  now = now or datetime.now()
+  updated = 0
+  for model, show_fk in COUNTED:
+    table = model.__table__
+    result = db.session.execute(
+      table.update().where(table.c.next_show_time <= now).values(roll_forward(table, show_fk, now))
+    )
+    updated += result.rowcount
+  db.session.commit()
+  return updated
+
+
+def recount(venue_ids, artist_ids, now=None):
+  # Recomputes the counters of the given rows, for writes that bypass the
+  # session events such as bulk imports.
+  now = now or datetime.now()
+  for (model, show_fk), entity_ids in zip(COUNTED, (venue_ids, artist_ids)):
+    if entity_ids:
+      table = model.__table__
+      db.session.execute(
+        table.update().where(table.c.id.in_(entity_ids)).values(recompute(table, show_fk, now))
+      )
+
+
+def reconcile(batch_size=10000, now=None):
+  # Recomputes every counter from the shows table, one id range per commit.
+  now = now or datetime.now()
+  updated = 0
+  for model, show_fk in COUNTED:
+    table = model.__table__
+    max_id = db.session.execute(db.select(db.func.max(table.c.id))).scalar() or 0
+    for start in range(0, max_id + 1, batch_size):
+      result = db.session.execute(
+        table.update()
+          .where(table.c.id >= start, table.c.id < start + batch_size)
+          .values(recompute(table, show_fk, now))
+      )
+      db.session.commit()
+      updated += result.rowcount
+  return updated
+
+
+counters_cli = AppGroup('counters', help='Maintain the denormalized show counters.')
+
+
+@counters_cli.command('rollover')
+def rollover_command():
+  """Move shows that have started from the upcoming to the past counters."""
+  click.echo('Rolled over %d rows.' % rollover())
+
+
+@counters_cli.command('reconcile')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows updated per transaction.')
+def reconcile_command(batch_size):
+  """Recompute every venue and artist counter from the shows table."""
+  click.echo('Reconciled %d rows.' % reconcile(batch_size))
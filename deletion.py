@@ -0,0 +1,100 @@
+import hmac
+
+import click
+from flask import Blueprint, abort, current_app, request
+from flask.cli import with_appcontext
+
+from api import json_response
+from models import db, Artist, Venue, Show
+from conditional import record_written
+from counters import recount
+
+#----------------------------------------------------------------------------#
+# Set-based deletes of venues and artists.
+#----------------------------------------------------------------------------#
+
+# Deleting a venue or artist is one DELETE statement; the database removes
+# its shows through the ON DELETE CASCADE foreign keys. Those shows never
+# reach the session, so the counters of the venues or artists on their other
+# side are recomputed here instead of by the events in counters.py.
+
+# kind: (model, its column on shows, the column of the other side)
+DELETES = {
+  'venues': (Venue, 'venue_id', 'artist_id'),
+  'artists': (Artist, 'artist_id', 'venue_id')
+}
+
+shows_table = Show.__table__
+
+
+def delete_rows(kind, ids):
+  # Returns the (id, name) rows deleted; ids that do not exist are ignored.
+  model, show_fk, other_fk = DELETES[kind]
+  table = model.__table__
+  ids = sorted(set(ids))
+  if not ids:
+    return []
+
+  counterparts = set(db.session.execute(
+    db.select(shows_table.c[other_fk]).where(shows_table.c[show_fk].in_(ids)).distinct()
+  ).scalars())
+  deleted = db.session.execute(
+    table.delete().where(table.c.id.in_(ids)).returning(table.c.id, table.c.name)
+  ).all()
+  if counterparts:
+    record_written(db.session, shows_table.name)
+    if kind == 'venues':
+      recount((), counterparts)
+    else:
+      recount(counterparts, ())
+  db.session.commit()
+
+  deleted_ids = [row.id for row in deleted]
+  search_index = current_app.extensions.get('search_index')
+  if search_index is not None:
+    if kind == 'venues':
+      search_index.remove_venues(deleted_ids)
+    else:
+      search_index.remove_artists(deleted_ids)
+  return deleted
+
+
+#  Endpoint
+#  ----------------------------------------------------------------
+
+deletions = Blueprint('deletions', __name__, url_prefix='/bulk')
+
+
+@deletions.route('/<kind>/delete', methods=['POST'])
+def bulk_delete(kind):
+  # takes {"ids": [...]} and needs 'Authorization: Bearer <BULK_DELETE_TOKEN>';
+  # disabled while unset
+  token = current_app.config.get('BULK_DELETE_TOKEN')
+  if not token or kind not in DELETES:
+    abort(404)
+  supplied = request.headers.get('Authorization', '')
+  if not hmac.compare_digest(supplied.encode(), ('Bearer ' + token).encode()):
+    abort(401)
+
+  body = request.get_json(silent=True)
+  ids = body.get('ids') if isinstance(body, dict) else None
+  # JSON true and false arrive as bools, which are ints to isinstance
+  if not isinstance(ids, list) or not all(
+      isinstance(entity_id, int) and not isinstance(entity_id, bool) for entity_id in ids):
+    return json_response({'error': 'Bad Request', 'message': 'Expected {"ids": [<integer>, ...]}.'}, 400)
+  deleted = delete_rows(kind, ids)
+  return json_response({'deleted': [row.id for row in deleted], 'count': len(deleted)})
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+@click.command('delete')
+@click.argument('kind', type=click.Choice(sorted(DELETES)))
+@click.argument('ids', nargs=-1, type=int, required=True)
+@click.confirmation_option(prompt='Delete these rows and all of their shows?')
+@with_appcontext
+def delete_command(kind, ids):
+  """Delete venues or artists, with their shows, by id."""
+  deleted = delete_rows(kind, ids)
+  click.echo('Deleted %d %s.' % (len(deleted), kind))
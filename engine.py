@@ -0,0 +1,108 @@
+import threading
+import time
+
+from flask import current_app, g, has_request_context, jsonify, request, stream_with_context
+from sqlalchemy import event, orm
+from sqlalchemy.pool import QueuePool
+
+from models import db
+
+#----------------------------------------------------------------------------#
+# Connection pool and statement timeouts.
+#----------------------------------------------------------------------------#
+
+class PoolStats:
+  # how long requests waited for a pooled connection, per process
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.checkouts = 0
+    self.wait_total = 0.0
+    self.wait_max = 0.0
+
+  def record(self, waited):
+    with self.lock:
+      self.checkouts += 1
+      self.wait_total += waited
+      self.wait_max = max(self.wait_max, waited)
+
+  def snapshot(self, pool):
+    with self.lock:
+      stats = {
+        'checkouts': self.checkouts,
+        'wait_total_seconds': self.wait_total,
+        'wait_max_seconds': self.wait_max,
+        'wait_avg_seconds': self.wait_total / self.checkouts if self.checkouts else 0.0
+      }
+    if isinstance(pool, QueuePool):
+      stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return stats
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+  # QueuePool that records how long each checkout waited
+
+  def _do_get(self):
+    started = time.perf_counter()
+    try:
+      return super()._do_get()
+    finally:
+      waited = time.perf_counter() - started
+      pool_stats.record(waited)
+      if has_request_context():
+        g.pool_wait = g.get('pool_wait', 0.0) + waited
+
+
+def statement_timeout(milliseconds):
+  # overrides STATEMENT_TIMEOUT_MS for one view; 0 disables the timeout
+  def decorator(view):
+    view.statement_timeout = milliseconds
+    return view
+  return decorator
+
+
+@event.listens_for(orm.Session, 'after_begin')
+def apply_statement_timeout(session, transaction, connection):
+  # SET LOCAL only lasts until the end of the transaction, so the pooled
+  # connection goes back to the pool without the request's budget
+  if not has_request_context() or connection.dialect.name != 'postgresql':
+    return
+  view = current_app.view_functions.get(request.endpoint)
+  milliseconds = getattr(view, 'statement_timeout', current_app.config.get('STATEMENT_TIMEOUT_MS'))
+  if milliseconds:
+    connection.exec_driver_sql('SET LOCAL statement_timeout = %d' % int(milliseconds))
+
+
+def stream_with_session(chunks):
+  # Like stream_with_context, for response bodies read from the request's
+  # session. The session is removed when the view returns, before the body
+  # is read, so the connection the rows then check out would stay out of the
+  # pool until garbage collection; it is closed once the body is written.
+  session = db.session()
+
+  def generate():
+    try:
+      yield from chunks
+    finally:
+      session.close()
+  return stream_with_context(generate())
+
+
+def pool_status():
+  return jsonify(pool_stats.snapshot(db.engine.pool))
+
+
+def init_app(app):
+  # must run before db.init_app so the engine is built with the timed pool
+  if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).setdefault('poolclass', TimedQueuePool)
+
+  @app.after_request
+  def add_server_timing(response):
+    if 'pool_wait' in g:
+      response.headers.add('Server-Timing', 'db-pool;dur=%.2f' % (g.pool_wait * 1000))
+    return response
+
+  app.add_url_rule('/_status/pool', 'pool_status', pool_status)
@@ -0,0 +1,237 @@
+import csv
+import hmac
+import io
+import sys
+import zlib
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask import Blueprint, Response, abort, current_app, request
+from flask.cli import with_appcontext
+
+from api import dumps
+from models import db, Artist, Venue, Show
+from engine import statement_timeout, stream_with_session
+
+#----------------------------------------------------------------------------#
+# Streaming catalogue export.
+#----------------------------------------------------------------------------#
+
+EXPORTS = {'artists': Artist, 'venues': Venue, 'shows': Show}
+FORMATS = {
+  'csv': 'text/csv',
+  'ndjson': 'application/x-ndjson',
+  'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def batched(rows, size):
+  rows = iter(rows)
+  while True:
+    batch = list(islice(rows, size))
+    if not batch:
+      return
+    yield batch
+
+
+def export_rows(kind, since=None, until=None, batch_size=1000):
+  # Rows come from a server-side cursor, batch_size at a time, so memory
+  # does not grow with the size of the table.
+  table = EXPORTS[kind].__table__
+  statement = db.select(table).order_by(table.c.id)
+  if since is not None:
+    statement = statement.where(table.c.start_time >= since)
+  if until is not None:
+    statement = statement.where(table.c.start_time < until)
+  session = db.session()
+
+  def rows():
+    # run once the body is read, after the request's session was removed
+    # and the cursor of a query run earlier with it closed
+    yield from session.execute(statement.execution_options(yield_per=batch_size))
+  return list(table.columns.keys()), rows()
+
+
+#  Formats
+#  ----------------------------------------------------------------
+
+def csv_value(value):
+  if isinstance(value, list):
+    # the same ';'-separated genres 'flask import' reads
+    return ';'.join(value)
+  if isinstance(value, datetime):
+    return value.isoformat(' ')
+  return value
+
+
+def csv_chunks(kind, columns, rows, batch_size):
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  writer.writerow(columns)
+  for batch in batched(rows, batch_size):
+    writer.writerows([csv_value(value) for value in row] for row in batch)
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+  yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(kind, columns, rows, batch_size):
+  for batch in batched(rows, batch_size):
+    yield b''.join(dumps(dict(zip(columns, row))) + b'\n' for row in batch)
+
+
+class ChunkSink(io.RawIOBase):
+  # write-only file that hands back whatever was written since the last drain
+
+  def __init__(self):
+    self.chunks = []
+    self.position = 0
+
+  def writable(self):
+    return True
+
+  def write(self, data):
+    self.chunks.append(bytes(data))
+    self.position += len(data)
+    return len(data)
+
+  def tell(self):
+    return self.position
+
+  def drain(self):
+    data = b''.join(self.chunks)
+    self.chunks = []
+    return data
+
+
+def load_pyarrow():
+  # imported on first use, it takes longer to import than the rest of the app
+  try:
+    import pyarrow
+    import pyarrow.parquet
+  except ImportError:
+    raise ValueError('Parquet export needs pyarrow installed.')
+  return pyarrow
+
+
+def arrow_schema(table):
+  pyarrow = load_pyarrow()
+  types = {
+    db.Integer: pyarrow.int64(),
+    db.String: pyarrow.string(),
+    db.Boolean: pyarrow.bool_(),
+    db.DateTime: pyarrow.timestamp('us'),
+    db.ARRAY: pyarrow.list_(pyarrow.string())
+  }
+  fields = []
+  for column in table.columns:
+    arrow_type = next(arrow_type for sql_type, arrow_type in types.items() if isinstance(column.type, sql_type))
+    fields.append(pyarrow.field(column.name, arrow_type))
+  return pyarrow.schema(fields)
+
+
+def parquet_chunks(kind, columns, rows, batch_size):
+  # one row group per batch, written out as soon as it is encoded
+  pyarrow = load_pyarrow()
+  schema = arrow_schema(EXPORTS[kind].__table__)
+  sink = ChunkSink()
+  writer = pyarrow.parquet.ParquetWriter(sink, schema)
+  for batch in batched(rows, batch_size):
+    writer.write_table(pyarrow.Table.from_pylist([dict(zip(columns, row)) for row in batch], schema=schema))
+    yield sink.drain()
+  writer.close()
+  yield sink.drain()
+
+
+WRITERS = {'csv': csv_chunks, 'ndjson': ndjson_chunks, 'parquet': parquet_chunks}
+
+
+def gzipped(chunks):
+  compressor = zlib.compressobj(wbits=31)
+  for chunk in chunks:
+    data = compressor.compress(chunk)
+    if data:
+      yield data
+  yield compressor.flush()
+
+
+def export(kind, format='csv', compress=False, since=None, until=None, batch_size=1000):
+  if format == 'parquet':
+    load_pyarrow()
+  if (since or until) and kind != 'shows':
+    raise ValueError('Only shows can be exported by time window.')
+  columns, rows = export_rows(kind, since, until, batch_size)
+  chunks = WRITERS[format](kind, columns, rows, batch_size)
+  return gzipped(chunks) if compress else chunks
+
+
+#  Download endpoint
+#  ----------------------------------------------------------------
+
+exports = Blueprint('exports', __name__, url_prefix='/exports')
+
+
+def parse_time(value):
+  try:
+    return datetime.fromisoformat(value) if value else None
+  except ValueError:
+    abort(400)
+
+
+@exports.route('/<kind>')
+@statement_timeout(0)
+def download(kind):
+  # needs 'Authorization: Bearer <EXPORT_TOKEN>'; disabled while unset
+  token = current_app.config.get('EXPORT_TOKEN')
+  if not token:
+    abort(404)
+  supplied = request.headers.get('Authorization', '')
+  if not hmac.compare_digest(supplied.encode(), ('Bearer ' + token).encode()):
+    abort(401)
+
+  format = request.args.get('format', 'csv')
+  if kind not in EXPORTS or format not in FORMATS:
+    abort(404)
+  compress = request.args.get('gzip') in ('1', 'true')
+  try:
+    chunks = export(kind, format, compress,
+      since=parse_time(request.args.get('since')),
+      until=parse_time(request.args.get('until')))
+  except ValueError as e:
+    abort(400, str(e))
+
+  filename = kind + '.' + format + ('.gz' if compress else '')
+  response = Response(stream_with_session(chunks),
+    mimetype='application/gzip' if compress else FORMATS[format])
+  response.headers['Content-Disposition'] = 'attachment; filename=' + filename
+  return response
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+@click.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'format', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True),
+  help='File to write; standard output by default.')
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip.')
+@click.option('--since', type=click.DateTime(), help='Only shows starting at or after this time.')
+@click.option('--until', type=click.DateTime(), help='Only shows starting before this time.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+@with_appcontext
+def export_command(kind, format, output, compress, since, until, batch_size):
+  """Stream artists, venues or shows to CSV, NDJSON or Parquet."""
+  try:
+    chunks = export(kind, format, compress, since, until, batch_size)
+  except ValueError as e:
+    raise click.UsageError(str(e))
+  out = open(output, 'wb') if output else sys.stdout.buffer
+  try:
+    for chunk in chunks:
+      out.write(chunk)
+  finally:
+    if output:
+      out.close()
@@ -0,0 +1,43 @@
+from datetime import datetime
+from functools import lru_cache
+
+#----------------------------------------------------------------------------#
+# Jinja filters.
+#----------------------------------------------------------------------------#
+
+# babel and dateutil are imported when a date is first formatted rather than
+# when the app starts
+
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+
+# babel's own named formats, resolved per locale rather than compiled here
+LOCALE_FORMATS = ('long', 'short')
+
+
+@lru_cache(maxsize=64)
+def compile_format(format, locale):
+  # babel re-parses the pattern and the locale on every call otherwise
+  import babel.dates
+  return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)), babel.Locale.parse(locale)
+
+
+@lru_cache(maxsize=4096)
+def format_datetime_cached(value, format, locale):
+  import babel.dates
+  if format in LOCALE_FORMATS:
+    return babel.dates.format_datetime(value, format, locale=locale)
+  pattern, babel_locale = compile_format(format, locale)
+  if value.tzinfo is None:
+    value = value.replace(tzinfo=babel.dates.UTC)
+  return pattern.apply(value, babel_locale)
+
+
+def format_datetime(value, format='medium', locale='en'):
+  # accepts datetimes as well as the strings older views used to pass
+  if not isinstance(value, datetime):
+    import dateutil.parser
+    value = dateutil.parser.parse(value)
+  return format_datetime_cached(value, format, locale)
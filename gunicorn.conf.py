@@ -0,0 +1,26 @@
+import gc
+import multiprocessing
+import os
+
+#----------------------------------------------------------------------------#
+# Gunicorn.
+#----------------------------------------------------------------------------#
+
+# The app is built and warmed up once in the master, then forked. Workers
+# start serving straight away and share the master's memory copy-on-write
+# for as long as neither side writes to it.
+
+wsgi_app = 'app:create_app(require_secret_key=True)'
+bind = os.getenv('BIND', '0.0.0.0:' + os.getenv('PORT', '8000'))
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def when_ready(server):
+  # runs in the master after the app is loaded and before any worker forks
+  from app import warm_up
+  warm_up(server.app.wsgi())
+  # objects that exist now are moved out of the collector's reach, so
+  # collections in the workers do not touch, and copy, the shared pages
+  gc.collect()
+  gc.freeze()
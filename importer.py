@@ -0,0 +1,252 @@
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.datastructures import MultiDict
+
+from forms import ArtistForm, VenueForm, ShowForm
+from models import db, Artist, Venue, Show
+from conditional import record_written
+from counters import recount
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+# rows are validated with the same forms the create pages use
+IMPORTS = {
+  'artists': (ArtistForm, Artist),
+  'venues': (VenueForm, Venue),
+  'shows': (ShowForm, Show)
+}
+
+FALSE_STRINGS = ('false', 'f', 'no', 'n', '0')
+
+
+class RowError(Exception):
+  pass
+
+
+def read_rows(path, format):
+  # yields (line number, row dict) without reading the whole file
+  with open(path, newline='', encoding='utf-8') as f:
+    if format == 'csv':
+      reader = csv.DictReader(f)
+      for row in reader:
+        yield reader.line_num, row
+    else:
+      for line_num, line in enumerate(f, 1):
+        if line.strip():
+          try:
+            yield line_num, json.loads(line)
+          except ValueError as e:
+            yield line_num, RowError('invalid JSON: %s' % e)
+
+
+def form_time(value):
+  # exports write ISO timestamps, with a 'T' in NDJSON, while the form only
+  # parses '%Y-%m-%d %H:%M:%S'
+  try:
+    return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+  except ValueError:
+    # left for the form to reject
+    return value
+
+
+def to_formdata(row):
+  formdata = MultiDict()
+  for name, value in row.items():
+    if value is None or value == '':
+      continue
+    if name == 'genres' and isinstance(value, str):
+      # CSV cells list genres separated by semicolons
+      value = [genre.strip() for genre in value.split(';') if genre.strip()]
+    if name == 'start_time' and isinstance(value, str):
+      value = form_time(value)
+    if isinstance(value, list):
+      for item in value:
+        formdata.add(name, item)
+    elif isinstance(value, str) and value.lower() in FALSE_STRINGS:
+      formdata.add(name, 'false')
+    else:
+      formdata.add(name, value)
+  return formdata
+
+
+def validate(form_class, model, row):
+  formdata = to_formdata(row)
+  form = form_class(formdata=formdata, meta={'csrf': False})
+  # a missing column would silently fall back to the field's default, the
+  # web form always posts every field
+  missing = [field.name for field in form if field.flags.required and field.name not in formdata]
+  if missing:
+    raise RowError('; '.join('%s: This field is required.' % name for name in missing))
+  if not form.validate():
+    raise RowError('; '.join('%s: %s' % (name, ', '.join(errors)) for name, errors in form.errors.items()))
+  columns = model.__table__.columns
+  values = {name: value for name, value in form.data.items() if name in columns}
+  if model is Show:
+    # references may be given by id or by name; both are resolved per batch
+    values['artist_name'] = row.get('artist_name')
+    values['venue_name'] = row.get('venue_name')
+  else:
+    values['date_listed'] = datetime.now()
+  return values
+
+
+def resolve(model, ids, names):
+  # maps every referenced id and unique name to an id with two queries
+  found = {}
+  if ids:
+    for (entity_id,) in db.session.query(model.id).filter(model.id.in_(ids)):
+      found[entity_id] = entity_id
+  if names:
+    by_name = {}
+    for entity_id, name in db.session.query(model.id, model.name).filter(model.name.in_(names)):
+      by_name.setdefault(name, []).append(entity_id)
+    for name, matches in by_name.items():
+      found[name] = matches[0] if len(matches) == 1 else None
+  return found
+
+
+def resolve_shows(batch, errors):
+  references = {}
+  for model, prefix in ((Artist, 'artist'), (Venue, 'venue')):
+    ids, names = set(), set()
+    for line_num, values in batch:
+      if values[prefix + '_id']:
+        try:
+          values[prefix + '_id'] = int(values[prefix + '_id'])
+        except ValueError:
+          continue
+        ids.add(values[prefix + '_id'])
+      elif values[prefix + '_name']:
+        names.add(values[prefix + '_name'])
+    references[prefix] = resolve(model, ids, names)
+
+  resolved = []
+  for line_num, values in batch:
+    try:
+      for prefix in ('artist', 'venue'):
+        reference = values.pop(prefix + '_id') or values.get(prefix + '_name')
+        if reference is None:
+          raise RowError('%s_id or %s_name is required' % (prefix, prefix))
+        if reference not in references[prefix]:
+          raise RowError('unknown %s %r' % (prefix, reference))
+        if references[prefix][reference] is None:
+          raise RowError('%s name %r is ambiguous' % (prefix, reference))
+        values[prefix + '_id'] = references[prefix][reference]
+      values.pop('artist_name')
+      values.pop('venue_name')
+      resolved.append(values)
+    except RowError as e:
+      errors.append((line_num, str(e)))
+  return resolved
+
+
+#  Writers
+#  ----------------------------------------------------------------
+
+def copy_value(value):
+  if value is None:
+    return None
+  if isinstance(value, list):
+    # postgres array literal
+    return '{' + ','.join('"%s"' % item.replace('\\', '\\\\').replace('"', '\\"') for item in value) + '}'
+  return value
+
+
+def copy_rows(table, rows):
+  # COPY ... FROM STDIN through the raw DBAPI connection
+  columns = list(rows[0])
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  for row in rows:
+    writer.writerow(['\\N' if copy_value(row[name]) is None else copy_value(row[name]) for name in columns])
+  buffer.seek(0)
+  sql = "COPY %s (%s) FROM STDIN WITH (FORMAT csv, NULL '\\N')" % (table.name, ', '.join(columns))
+
+  cursor = db.session.connection().connection.cursor()
+  try:
+    if hasattr(cursor, 'copy_expert'):
+      cursor.copy_expert(sql, buffer)
+    else:
+      with cursor.copy(sql) as copy:
+        copy.write(buffer.getvalue())
+  finally:
+    cursor.close()
+  record_written(db.session, table.name)
+
+
+def insert_rows(table, rows):
+  db.session.execute(table.insert(), rows)
+
+
+def write_batch(model, rows, use_copy):
+  if not rows:
+    return
+  table = model.__table__
+  if use_copy:
+    copy_rows(table, rows)
+  else:
+    insert_rows(table, rows)
+  if model is Show:
+    # COPY and executemany skip the ORM events that keep counters current
+    recount({row['venue_id'] for row in rows}, {row['artist_id'] for row in rows})
+  db.session.commit()
+
+
+def import_file(kind, path, format=None, batch_size=5000, use_copy=None):
+  # Returns (imported, errors) where errors lists (line number, message).
+  form_class, model = IMPORTS[kind]
+  format = format or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+  if use_copy is None:
+    use_copy = db.engine.dialect.name == 'postgresql'
+
+  imported = 0
+  errors = []
+  batch = []
+
+  def flush():
+    rows = resolve_shows(batch, errors) if model is Show else [values for line_num, values in batch]
+    write_batch(model, rows, use_copy)
+    del batch[:]
+    return len(rows)
+
+  for line_num, row in read_rows(path, format):
+    try:
+      if isinstance(row, RowError):
+        raise row
+      batch.append((line_num, validate(form_class, model, row)))
+    except RowError as e:
+      errors.append((line_num, str(e)))
+    if len(batch) >= batch_size:
+      imported += flush()
+  imported += flush()
+  errors.sort()
+
+  return imported, errors
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORTS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']),
+  help='Input format; guessed from the file extension by default.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows written per transaction.')
+@click.option('--copy/--no-copy', 'use_copy', default=None,
+  help='Use COPY (the default on PostgreSQL) or executemany.')
+@with_appcontext
+def import_command(kind, path, format, batch_size, use_copy):
+  """Import artists, venues or shows from a CSV or NDJSON file."""
+  imported, errors = import_file(kind, path, format, batch_size, use_copy)
+  for line_num, message in errors:
+    click.echo('%s:%d: %s' % (os.path.basename(path), line_num, message), err=True)
+  click.echo('Imported %d %s, %d rows rejected.' % (imported, kind, len(errors)))
+  if errors:
+    sys.exit(1)
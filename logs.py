@@ -0,0 +1,135 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+#----------------------------------------------------------------------------#
+# Structured, non-blocking logging.
+#----------------------------------------------------------------------------#
+
+# Records are formatted as JSON lines on the request thread, where the
+# request is still known, then handed to a queue. A background thread per
+# process writes them to a rotating file, so a slow disk never holds up a
+# response.
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+class JSONFormatter(logging.Formatter):
+
+  def format(self, record):
+    entry = {
+      'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+      'level': record.levelname,
+      'logger': record.name,
+      'message': record.getMessage()
+    }
+    if has_request_context():
+      entry.update(request_id=g.get('request_id'), route=request.endpoint, method=request.method, path=request.path)
+    entry.update(getattr(record, 'fields', {}))
+    if record.exc_info:
+      entry['exception'] = self.formatException(record.exc_info)
+    return json.dumps(entry, default=str)
+
+
+class InfoSampler(logging.Filter):
+  # keeps a share of INFO and DEBUG records; warnings and errors always pass
+
+  def __init__(self, rate):
+    super().__init__()
+    self.rate = rate
+
+  def filter(self, record):
+    return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class BackgroundHandler(QueueHandler):
+  # Queues records for a listener thread that writes them to the handler
+  # make_target() returns. Threads do not survive a fork, and with gunicorn's
+  # preload_app the app is created in the master, so every process builds
+  # its own target and starts its own listener the first time it logs.
+
+  def __init__(self, make_target):
+    super().__init__(queue.SimpleQueue())
+    self.make_target = make_target
+    self.target = None
+    self.listener = None
+    self.pid = None
+
+  def start(self):
+    self.queue = queue.SimpleQueue()
+    self.target = self.make_target()
+    self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+    self.listener.start()
+    self.pid = os.getpid()
+    atexit.register(self.stop)
+
+  def stop(self):
+    # flushes the queued records
+    if self.listener is not None and self.pid == os.getpid():
+      self.listener.stop()
+      self.target.close()
+      self.listener = None
+      self.pid = None
+
+  def enqueue(self, record):
+    if self.pid != os.getpid():
+      self.start()
+    super().enqueue(record)
+
+
+def file_handler(config):
+  # LOG_FILE may contain {pid}, giving each worker its own file to rotate;
+  # it is resolved in the process that writes the file
+  path = config.get('LOG_FILE', 'fyyur.log').format(pid=os.getpid())
+  rotate = config.get('LOG_ROTATE', 'size')
+  backups = config.get('LOG_BACKUP_COUNT', 5)
+  if rotate == 'size':
+    handler = RotatingFileHandler(path, maxBytes=config.get('LOG_MAX_BYTES', 10 * 1024 * 1024),
+      backupCount=backups, delay=True)
+  else:
+    # a TimedRotatingFileHandler interval, e.g. 'midnight' or 'H'
+    handler = TimedRotatingFileHandler(path, when=rotate, backupCount=backups, utc=True, delay=True)
+  handler.setFormatter(logging.Formatter('%(message)s'))
+  return handler
+
+
+def init_app(app):
+  handler = BackgroundHandler(lambda: file_handler(app.config))
+  handler.setFormatter(JSONFormatter())
+  handler.addFilter(InfoSampler(app.config.get('LOG_INFO_SAMPLE_RATE', 1.0)))
+  handler.setLevel(logging.INFO)
+  app.logger.setLevel(logging.INFO)
+  # Flask's own handler writes to stderr on the request thread
+  app.logger.removeHandler(default_handler)
+  app.logger.addHandler(handler)
+  slow_ms = app.config.get('LOG_SLOW_REQUEST_MS', 1000)
+
+  @app.before_request
+  def start_request_log():
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    g.log_started = time.perf_counter()
+
+  @app.after_request
+  def log_request(response):
+    if 'log_started' not in g:
+      return response
+    latency_ms = (time.perf_counter() - g.log_started) * 1000
+    # errors and slow requests are warnings, so sampling never drops them
+    level = logging.WARNING if response.status_code >= 500 or latency_ms >= slow_ms else logging.INFO
+    app.logger.log(level, 'request', extra={'fields': {
+      'status': response.status_code,
+      'latency_ms': round(latency_ms, 2),
+      'queries': g.get('sql_count', 0)
+    }})
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    return response
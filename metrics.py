@@ -0,0 +1,212 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from models import db
+from engine import pool_stats
+
+#----------------------------------------------------------------------------#
+# Request, SQL and template metrics.
+#----------------------------------------------------------------------------#
+
+# Figures are kept per worker process and served from /metrics in the
+# Prometheus text format; Prometheus adds them up across workers when each
+# one is scraped as its own target.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def format_labels(names, values):
+  if not names:
+    return ''
+  pairs = []
+  for name, value in zip(names, values):
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    pairs.append('%s="%s"' % (name, value))
+  return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+
+  type = 'counter'
+
+  def __init__(self, name, help, labels=()):
+    self.name = name
+    self.help = help
+    self.labels = labels
+    self.values = {}
+    self.lock = threading.Lock()
+
+  def inc(self, labels=(), amount=1):
+    with self.lock:
+      self.values[labels] = self.values.get(labels, 0) + amount
+
+  def samples(self):
+    with self.lock:
+      for labels, value in sorted(self.values.items()):
+        yield self.name + format_labels(self.labels, labels), value
+
+
+class Histogram:
+
+  type = 'histogram'
+
+  def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+    self.name = name
+    self.help = help
+    self.labels = labels
+    self.buckets = buckets
+    # labels -> [count per bucket (the last one is +Inf), sum]
+    self.values = {}
+    self.lock = threading.Lock()
+
+  def observe(self, labels, value):
+    with self.lock:
+      counts, total = self.values.get(labels) or ([0] * (len(self.buckets) + 1), 0)
+      counts[bisect_left(self.buckets, value)] += 1
+      self.values[labels] = counts, total + value
+
+  def samples(self):
+    with self.lock:
+      values = sorted((labels, list(counts), total) for labels, (counts, total) in self.values.items())
+    names = self.labels + ('le',)
+    for labels, counts, total in values:
+      cumulative = 0
+      for bound, count in zip(self.buckets + ('+Inf',), counts):
+        cumulative += count
+        yield self.name + '_bucket' + format_labels(names, labels + (bound,)), cumulative
+      yield self.name + '_sum' + format_labels(self.labels, labels), total
+      yield self.name + '_count' + format_labels(self.labels, labels), cumulative
+
+
+class Gauge:
+  # reads its value when scraped; type='counter' for values that only grow
+
+  def __init__(self, name, help, read, type='gauge'):
+    self.name = name
+    self.help = help
+    self.read = read
+    self.type = type
+
+  def samples(self):
+    value = self.read()
+    if value is not None:
+      yield self.name, value
+
+
+def exposition(metrics):
+  lines = []
+  for metric in metrics:
+    lines.append('# HELP %s %s' % (metric.name, metric.help))
+    lines.append('# TYPE %s %s' % (metric.name, metric.type))
+    for sample, value in metric.samples():
+      lines.append('%s %s' % (sample, repr(float(value)) if isinstance(value, float) else value))
+  return '\n'.join(lines) + '\n'
+
+
+#  Collected figures
+#  ----------------------------------------------------------------
+
+requests_total = Counter('fyyur_requests_total',
+  'Requests served, by endpoint, method and status.', ('endpoint', 'method', 'status'))
+request_duration = Histogram('fyyur_request_duration_seconds',
+  'Time from the start of the request until the response is returned.', ('endpoint', 'method'))
+request_queries = Histogram('fyyur_request_sql_statements',
+  'SQL statements executed per request.', ('endpoint',), buckets=QUERY_BUCKETS)
+sql_statements = Counter('fyyur_sql_statements_total',
+  'SQL statements executed while serving requests.', ('endpoint',))
+sql_duration = Counter('fyyur_sql_duration_seconds_total',
+  'Time spent executing SQL statements while serving requests.', ('endpoint',))
+template_duration = Histogram('fyyur_template_render_seconds',
+  'Time spent rendering each Jinja template.', ('template',))
+
+
+def pool_figure(name):
+  def read():
+    return pool_stats.snapshot(db.engine.pool).get(name)
+  return read
+
+pool_gauges = [
+  Gauge('fyyur_db_pool_size', 'Connections the pool keeps open.', pool_figure('size')),
+  Gauge('fyyur_db_pool_checked_out', 'Connections currently checked out.', pool_figure('checked_out')),
+  Gauge('fyyur_db_pool_overflow', 'Connections open beyond the pool size.', pool_figure('overflow')),
+  Gauge('fyyur_db_pool_checkouts_total', 'Connections checked out since the worker started.',
+    pool_figure('checkouts'), type='counter'),
+  Gauge('fyyur_db_pool_wait_seconds_total', 'Time spent waiting for a connection.',
+    pool_figure('wait_total_seconds'), type='counter'),
+  Gauge('fyyur_db_pool_wait_max_seconds', 'Longest single wait for a connection.', pool_figure('wait_max_seconds'))
+]
+
+METRICS = [requests_total, request_duration, request_queries, sql_statements, sql_duration, template_duration]
+
+
+#  Hooks
+#  ----------------------------------------------------------------
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+  conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def end_statement(conn, cursor, statement, parameters, context, executemany):
+  finish_statement(conn)
+
+
+@event.listens_for(Engine, 'handle_error')
+def fail_statement(exception_context):
+  # after_cursor_execute never runs for a statement that raised, and the
+  # start time would stay on the pooled connection
+  conn = exception_context.connection
+  if conn is not None and conn.info.get('statement_started'):
+    finish_statement(conn)
+
+
+def finish_statement(conn):
+  elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+  if has_request_context():
+    g.sql_count = g.get('sql_count', 0) + 1
+    g.sql_time = g.get('sql_time', 0.0) + elapsed
+
+
+def start_template(app, template, context):
+  if has_request_context():
+    g.setdefault('template_started', []).append(time.perf_counter())
+
+
+def end_template(app, template, context):
+  if has_request_context() and g.get('template_started'):
+    template_duration.observe((template.name,), time.perf_counter() - g.template_started.pop())
+
+
+def metrics_view():
+  return Response(exposition(METRICS + pool_gauges), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+  before_render_template.connect(start_template, app)
+  template_rendered.connect(end_template, app)
+
+  @app.before_request
+  def start_request():
+    g.request_started = time.perf_counter()
+
+  @app.after_request
+  def record_request(response):
+    if 'request_started' not in g:
+      return response
+    endpoint = request.endpoint or 'unmatched'
+    elapsed = time.perf_counter() - g.request_started
+    requests_total.inc((endpoint, request.method, str(response.status_code)))
+    request_duration.observe((endpoint, request.method), elapsed)
+    request_queries.observe((endpoint,), g.get('sql_count', 0))
+    sql_statements.inc((endpoint,), g.get('sql_count', 0))
+    sql_duration.inc((endpoint,), g.get('sql_time', 0.0))
+    return response
+
+  app.add_url_rule('/metrics', 'metrics', metrics_view)
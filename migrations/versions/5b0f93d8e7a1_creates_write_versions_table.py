@@ -0,0 +1,34 @@
+"""creates write_versions table
+
+Revision ID: 5b0f93d8e7a1
+Revises: c4a7e19b2d60
+Create Date: 2026-10-18 16:22:37.904115
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0f93d8e7a1'
+down_revision = 'c4a7e19b2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    write_versions = op.create_table('write_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.bulk_insert(write_versions, [
+        {'name': name, 'version': 0, 'updated_at': now} for name in ('artists', 'venues', 'shows')
+    ])
+
+
+def downgrade():
+    op.drop_table('write_versions')
@@ -0,0 +1,31 @@
+"""drops trigram indexes on names
+
+Revision ID: 6c1d4f2a8b93
+Revises: 9a3e6d1c7b52
+Create Date: 2026-10-18 23:41:05.204816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1d4f2a8b93'
+down_revision = '9a3e6d1c7b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # searches are answered from the in-memory index (search.py), so no query
+    # reads these any more while every write to a name still updates them
+    op.drop_index('ix_artists_name_trgm', table_name='artists', if_exists=True)
+    op.drop_index('ix_venues_name_trgm', table_name='venues', if_exists=True)
+
+
+def downgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venues_name_trgm', 'venues', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artists_name_trgm', 'artists', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
@@ -0,0 +1,49 @@
+"""adds indexes for listing and show queries
+
+Revision ID: 8d21e6c0a5f3
+Revises: 3f9c2b7d41e8
+Create Date: 2026-10-18 11:47:03.562917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d21e6c0a5f3'
+down_revision = '3f9c2b7d41e8'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # upcoming/past splits and joins from either side of a show
+    ('ix_shows_venue_id_start_time', 'shows', ['venue_id', 'start_time'], {}),
+    ('ix_shows_artist_id_start_time', 'shows', ['artist_id', 'start_time'], {}),
+    # /shows keyset pagination, newest first
+    ('ix_shows_start_time_id', 'shows', ['start_time', 'id'], {}),
+    # /venues listing, grouped and paged by area
+    ('ix_venues_city_state_id', 'venues', ['city', 'state', 'id'], {}),
+    # recently listed artists and venues on the home page
+    ('ix_artists_date_listed', 'artists', [sa.text('date_listed DESC')], {}),
+    ('ix_venues_date_listed', 'venues', [sa.text('date_listed DESC')], {}),
+    # genre containment filters
+    ('ix_artists_genres', 'artists', ['genres'], {'postgresql_using': 'gin'}),
+    ('ix_venues_genres', 'venues', ['genres'], {'postgresql_using': 'gin'}),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, so each
+    # index is built in autocommit mode and writes keep flowing meanwhile.
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True,
+                if_not_exists=True, **kwargs)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True,
+                if_exists=True)
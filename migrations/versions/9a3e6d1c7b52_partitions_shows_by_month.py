@@ -0,0 +1,92 @@
+"""partitions shows by month
+
+Revision ID: 9a3e6d1c7b52
+Revises: e2b8c5f19a47
+Create Date: 2026-10-18 22:04:17.562039
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e6d1c7b52'
+down_revision = 'e2b8c5f19a47'
+branch_labels = None
+depends_on = None
+
+# months of partitions created beyond the current one
+MONTHS_AHEAD = 3
+
+INDEXES = (
+    ('ix_shows_venue_id_start_time', ['venue_id', 'start_time']),
+    ('ix_shows_artist_id_start_time', ['artist_id', 'start_time']),
+    ('ix_shows_start_time_id', ['start_time', 'id']),
+)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def shows_table(name, **kw):
+    return op.create_table(name,
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('shows_id_seq'::regclass)"), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['venue_id'], ['venues.id'], name='shows_venue_id_fkey', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['artist_id'], ['artists.id'], name='shows_artist_id_fkey', ondelete='CASCADE'),
+    **kw
+    )
+
+
+def replace_shows(create):
+    # Renames shows out of the way, creates the new table with create(),
+    # copies the rows over and drops the old table. The id sequence is kept.
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='shows')
+    op.drop_constraint('shows_pkey', 'shows', type_='primary')
+    op.rename_table('shows', 'shows_old')
+    create()
+    op.execute('ALTER SEQUENCE shows_id_seq OWNED BY shows.id')
+    op.execute('INSERT INTO shows (id, venue_id, artist_id, start_time) '
+               'SELECT id, venue_id, artist_id, start_time FROM shows_old')
+    op.drop_table('shows_old')
+    # built after the copy, which is faster than maintaining them during it
+    for name, columns in INDEXES:
+        op.create_index(name, 'shows', columns, unique=False)
+
+
+def create_partitioned():
+    shows_table('shows', postgresql_partition_by='RANGE (start_time)')
+    op.create_primary_key('shows_pkey', 'shows', ['id', 'start_time'])
+    op.execute('CREATE TABLE shows_default PARTITION OF shows DEFAULT')
+
+    # a partition for every month from the earliest show to MONTHS_AHEAD
+    # after this one; rows further ahead land in shows_default until
+    # 'flask partitions create' gets to them
+    earliest = op.get_bind().execute(sa.text('SELECT min(start_time) FROM shows_old')).scalar()
+    now = datetime.now()
+    month = datetime((earliest or now).year, (earliest or now).month, 1)
+    last = add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute("CREATE TABLE shows_{:%Y_%m} PARTITION OF shows FOR VALUES FROM ('{:%Y-%m-%d}') TO ('{:%Y-%m-%d}')"
+            .format(month, month, add_months(month, 1)))
+        month = add_months(month, 1)
+
+
+def create_unpartitioned():
+    shows_table('shows')
+    op.create_primary_key('shows_pkey', 'shows', ['id'])
+
+
+def upgrade():
+    replace_shows(create_partitioned)
+
+
+def downgrade():
+    # archived partitions that were detached are not brought back
+    replace_shows(create_unpartitioned)
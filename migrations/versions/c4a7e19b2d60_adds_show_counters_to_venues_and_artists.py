@@ -0,0 +1,41 @@
+"""adds show counters to venues and artists
+
+Revision ID: c4a7e19b2d60
+Revises: 8d21e6c0a5f3
+Create Date: 2026-10-18 14:05:51.730482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e19b2d60'
+down_revision = '8d21e6c0a5f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, show_fk in (('venues', 'venue_id'), ('artists', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_time', sa.DateTime(), nullable=True))
+        op.create_index(op.f('ix_{}_next_show_time'.format(table)), table, ['next_show_time'], unique=False)
+
+        # backfill from the existing shows
+        op.execute(
+            'UPDATE {table} SET '
+            'upcoming_shows_count = (SELECT count(*) FROM shows WHERE shows.{fk} = {table}.id AND shows.start_time > now()), '
+            'past_shows_count = (SELECT count(*) FROM shows WHERE shows.{fk} = {table}.id AND shows.start_time <= now()), '
+            'next_show_time = (SELECT min(start_time) FROM shows WHERE shows.{fk} = {table}.id AND shows.start_time > now())'
+            .format(table=table, fk=show_fk)
+        )
+
+
+def downgrade():
+    for table in ('artists', 'venues'):
+        op.drop_index(op.f('ix_{}_next_show_time'.format(table)), table_name=table)
+        op.drop_column(table, 'next_show_time')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,31 @@
+"""cascades show deletes in the database
+
+Revision ID: e2b8c5f19a47
+Revises: 5b0f93d8e7a1
+Create Date: 2026-10-18 21:10:42.318506
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8c5f19a47'
+down_revision = '5b0f93d8e7a1'
+branch_labels = None
+depends_on = None
+
+# the constraints were created unnamed, so they carry PostgreSQL's default names
+FOREIGN_KEYS = (('shows_venue_id_fkey', 'venues', 'venue_id'), ('shows_artist_id_fkey', 'artists', 'artist_id'))
+
+
+def upgrade():
+    for name, referred, column in FOREIGN_KEYS:
+        op.drop_constraint(name, 'shows', type_='foreignkey')
+        op.create_foreign_key(name, 'shows', referred, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for name, referred, column in FOREIGN_KEYS:
+        op.drop_constraint(name, 'shows', type_='foreignkey')
+        op.create_foreign_key(name, 'shows', referred, [column], ['id'])
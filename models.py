@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 #----------------------------------------------------------------------------#
 # Models.
@@ -8,6 +10,11 @@ db = SQLAlchemy()
 
 class Venue(db.Model): #COMPLETED
     __tablename__ = 'venues'
+    __table_args__ = (
+        db.Index('ix_venues_city_state_id', 'city', 'state', 'id'),
+        db.Index('ix_venues_date_listed', db.text('date_listed DESC')),
+        db.Index('ix_venues_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -22,10 +29,19 @@ class Venue(db.Model): #COMPLETED
     seeking_talent = db.Column(db.Boolean())
     seeking_description = db.Column(db.String(550))
     date_listed = db.Column(db.DateTime, nullable=False)
-    shows = db.relationship('Show', backref='venue', lazy=True, cascade='all, delete')
+    # denormalized from shows, kept current by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    # shows are deleted by the database's ON DELETE CASCADE, not loaded to be deleted
+    shows = db.relationship('Show', backref='venue', lazy=True, cascade='all, delete', passive_deletes=True)
 
 class Artist(db.Model): #COMPLETED
     __tablename__ = 'artists'
+    __table_args__ = (
+        db.Index('ix_artists_date_listed', db.text('date_listed DESC')),
+        db.Index('ix_artists_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -39,11 +55,35 @@ class Artist(db.Model): #COMPLETED
     seeking_venue = db.Column(db.Boolean())
     seeking_description = db.Column(db.String(550))
     date_listed = db.Column(db.DateTime, nullable=False)
-    shows = db.relationship('Show', backref='artist', lazy=True, cascade='all, delete')
+    # denormalized from shows, kept current by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    # shows are deleted by the database's ON DELETE CASCADE, not loaded to be deleted
+    shows = db.relationship('Show', backref='artist', lazy=True, cascade='all, delete', passive_deletes=True)
 
 class Show(db.Model): #COMPLETED
   __tablename__ = 'shows'
+  __table_args__ = (
+    db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+    db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+  )
+  # On PostgreSQL the migrations partition this table by month of start_time
+  # (see partitions.py), which makes its primary key (id, start_time). The
+  # model keeps id alone, so create_all still works on any database.
   id = db.Column(db.Integer, primary_key=True)
-  venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable = False)
-  artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable = False)
-  start_time = db.Column(db.DateTime, nullable=False)
\ No newline at end of file
+  # active_history loads the previous ids when they are set, even on an
+  # expired Show, so counters.py can recount a moved show's previous owners
+  venue_id = db.mapped_column(db.Integer, db.ForeignKey('venues.id', ondelete='CASCADE'), nullable = False,
+    active_history=True)
+  artist_id = db.mapped_column(db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), nullable = False,
+    active_history=True)
+  start_time = db.Column(db.DateTime, nullable=False)
+
+class WriteVersion(db.Model):
+  # one row per table, bumped by conditional.py on every commit that writes it
+  __tablename__ = 'write_versions'
+  name = db.Column(db.String(64), primary_key=True)
+  version = db.Column(db.Integer, nullable=False, default=0)
+  updated_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import abort, current_app, request
+from sqlalchemy import tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset (cursor) pagination.
+#----------------------------------------------------------------------------#
+
+class Page:
+  def __init__(self, items, next_cursor=None, prev_cursor=None):
+    self.items = items
+    self.next_cursor = next_cursor
+    self.prev_cursor = prev_cursor
+
+  def __iter__(self):
+    return iter(self.items)
+
+  def __len__(self):
+    return len(self.items)
+
+
+def encode_cursor(direction, key):
+  values = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in key]
+  payload = json.dumps({'d': direction, 'k': values}, separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_value(value, column):
+  # a key value must have its column's type; datetimes are sent as {'dt': ...}
+  expected = column.type.python_type
+  if expected is datetime and isinstance(value, dict):
+    return datetime.fromisoformat(value['dt'])
+  if value is None or type(value) is expected:
+    return value
+  raise ValueError('%r is not a %s' % (value, expected.__name__))
+
+
+def decode_cursor(cursor, columns):
+  # malformed or tampered cursors are a client error, not a server one
+  try:
+    payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    direction, values = payload['d'], payload['k']
+    if not isinstance(values, list) or len(values) != len(columns):
+      abort(400)
+    key = [decode_value(value, column) for value, column in zip(values, columns)]
+  except (binascii.Error, ValueError, KeyError, TypeError):
+    abort(400)
+  if direction not in ('next', 'prev'):
+    abort(400)
+  return direction, key
+
+
+def get_page_size(default_key='PAGE_SIZE', max_key='MAX_PAGE_SIZE'):
+  per_page = request.args.get('per_page', current_app.config.get(default_key, 50), type=int)
+  return max(1, min(per_page, current_app.config.get(max_key, 200)))
+
+
+def seek(query, columns, cursor=None, descending=False):
+  # orders query by columns and skips past the cursor row, if any
+  direction, after = decode_cursor(cursor, columns) if cursor else ('next', None)
+
+  # walking backwards flips both the comparison and the sort order
+  backwards = direction == 'prev'
+  reverse = descending != backwards
+  if after is not None:
+    row = tuple_(*columns)
+    query = query.filter(row < tuple_(*after) if reverse else row > tuple_(*after))
+  query = query.order_by(*[column.desc() if reverse else column.asc() for column in columns])
+  return query, backwards, after is not None
+
+
+def page_cursors(first_key, last_key, has_more, backwards, has_cursor):
+  next_cursor = prev_cursor = None
+  if first_key is not None:
+    if has_more or backwards:
+      next_cursor = encode_cursor('next', last_key)
+    if (has_more and backwards) or (has_cursor and not backwards):
+      prev_cursor = encode_cursor('prev', first_key)
+  return next_cursor, prev_cursor
+
+
+def paginate(session, statement, columns, key, cursor=None, per_page=None, descending=False, scalars=False):
+  # Pages through a select() ordered by columns, which must identify a row
+  # uniquely. key(item) returns the values of those columns for an item.
+  # Each page seeks past the cursor row instead of using OFFSET.
+  # scalars=True pages through entities rather than rows.
+  per_page = per_page or get_page_size()
+  statement, backwards, has_cursor = seek(statement, columns, cursor, descending)
+  result = session.execute(statement.limit(per_page + 1))
+  items = list(result.scalars() if scalars else result)
+  return make_page(items, per_page, key, backwards, has_cursor)
+
+
+async def paginate_async(session, statement, columns, key, cursor=None, per_page=None, descending=False, scalars=False):
+  # paginate on an AsyncSession
+  per_page = per_page or get_page_size()
+  statement, backwards, has_cursor = seek(statement, columns, cursor, descending)
+  result = await session.execute(statement.limit(per_page + 1))
+  items = list(result.scalars() if scalars else result)
+  return make_page(items, per_page, key, backwards, has_cursor)
+
+
+def make_page(items, per_page, key, backwards, has_cursor):
+  # items holds up to per_page + 1 rows in seek order
+  has_more = len(items) > per_page
+  items = items[:per_page]
+  if backwards:
+    items.reverse()
+
+  next_cursor, prev_cursor = page_cursors(
+    key(items[0]) if items else None, key(items[-1]) if items else None,
+    has_more, backwards, has_cursor)
+  return Page(items, next_cursor, prev_cursor)
+
+
+class PageStream:
+  # Like paginate, but rows are fetched in batches while they are iterated
+  # instead of being loaded up front. The cursors are known once the
+  # iteration is over. Backward pages are buffered, since they are read
+  # in reverse.
+
+  def __init__(self, query, columns, key, cursor=None, per_page=None, descending=False, batch_size=500):
+    self.per_page = per_page or get_page_size()
+    self.key = key
+    query, self.backwards, self.has_cursor = seek(query, columns, cursor, descending)
+    self.query = query.limit(self.per_page + 1).yield_per(batch_size)
+    self.next_cursor = self.prev_cursor = None
+
+  def __iter__(self):
+    if self.backwards:
+      items = list(self.query)
+      has_more = len(items) > self.per_page
+      rows = reversed(items[:self.per_page])
+    else:
+      rows = iter(self.query)
+      has_more = False
+    first = last = None
+    for count, item in enumerate(rows):
+      if count == self.per_page:
+        # the extra row only tells whether there is another page
+        has_more = True
+        break
+      if first is None:
+        first = item
+      last = item
+      yield item
+    self.next_cursor, self.prev_cursor = page_cursors(
+      self.key(first) if first is not None else None,
+      self.key(last) if last is not None else None,
+      has_more, self.backwards, self.has_cursor)
@@ -0,0 +1,154 @@
+import re
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from models import db, Show
+from conditional import record_written
+from counters import recount
+
+#----------------------------------------------------------------------------#
+# Monthly partitions of the shows table (PostgreSQL).
+#----------------------------------------------------------------------------#
+
+# shows is range-partitioned on start_time, one partition per month named
+# shows_YYYY_MM, plus shows_default for rows no partition covers. Queries
+# that bound start_time, such as the upcoming shows, only read the
+# partitions that can hold matching rows. Partitions are created ahead of
+# time, and old ones are archived: detached from shows and moved to another
+# schema, or dropped.
+
+PARTITION_NAME = re.compile(r'^shows_(\d{4})_(\d{2})$')
+DEFAULT_PARTITION = 'shows_default'
+
+shows_table = Show.__table__
+
+
+def month_start(moment):
+  return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, count):
+  index = month.year * 12 + month.month - 1 + count
+  return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+  return 'shows_{:%Y_%m}'.format(month)
+
+
+def quote(identifier):
+  return db.engine.dialect.identifier_preparer.quote_identifier(identifier)
+
+
+def partitions():
+  # {first day of the month: partition name} of the attached partitions
+  names = db.session.execute(db.text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = 'shows'::regclass"
+  )).scalars()
+  months = {}
+  for name in names:
+    match = PARTITION_NAME.match(name)
+    if match:
+      months[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+  return months
+
+
+def create_partition(month):
+  # Shows already in the default partition for this month are moved into
+  # the new one, which is then attached; attaching fails while the default
+  # partition still holds rows of its range.
+  name, bounds = partition_name(month), {'start': month, 'end': add_months(month, 1)}
+  db.session.execute(db.text('CREATE TABLE %s (LIKE shows INCLUDING DEFAULTS INCLUDING CONSTRAINTS)' % name))
+  db.session.execute(db.text(
+    'WITH moved AS (DELETE FROM %s WHERE start_time >= :start AND start_time < :end RETURNING *) '
+    'INSERT INTO %s SELECT * FROM moved' % (DEFAULT_PARTITION, name)
+  ), bounds)
+  db.session.execute(db.text(
+    "ALTER TABLE shows ATTACH PARTITION %s FOR VALUES FROM ('%s') TO ('%s')"
+    % (name, bounds['start'].date(), bounds['end'].date())
+  ))
+  return name
+
+
+def create_partitions(ahead=3, now=None):
+  # Creates the missing partitions from this month to `ahead` months after
+  # it. Returns their names.
+  month = month_start(now or datetime.now())
+  existing = partitions()
+  created = [create_partition(add_months(month, offset))
+    for offset in range(ahead + 1) if add_months(month, offset) not in existing]
+  db.session.commit()
+  return created
+
+
+def archive_partitions(retain_months, schema='archive', tablespace=None, drop=False, now=None):
+  # Detaches the partitions of months that ended more than retain_months
+  # ago, then drops them or moves them to schema (and tablespace, e.g. one
+  # on cheaper or compressed storage). Their shows no longer appear on any
+  # page, so the past counters of their venues and artists are recomputed.
+  # Returns the names of the archived partitions.
+  cutoff = add_months(month_start(now or datetime.now()), -retain_months)
+  old = sorted(name for month, name in partitions().items() if add_months(month, 1) <= cutoff)
+  if not old:
+    return []
+
+  venue_ids, artist_ids = set(), set()
+  for name in old:
+    for row in db.session.execute(db.text('SELECT DISTINCT venue_id, artist_id FROM %s' % name)):
+      venue_ids.add(row.venue_id)
+      artist_ids.add(row.artist_id)
+    db.session.execute(db.text('ALTER TABLE shows DETACH PARTITION %s' % name))
+    if drop:
+      db.session.execute(db.text('DROP TABLE %s' % name))
+      continue
+    db.session.execute(db.text('CREATE SCHEMA IF NOT EXISTS %s' % quote(schema)))
+    db.session.execute(db.text('ALTER TABLE %s SET SCHEMA %s' % (name, quote(schema))))
+    if tablespace:
+      db.session.execute(db.text('ALTER TABLE %s.%s SET TABLESPACE %s' % (quote(schema), name, quote(tablespace))))
+
+  record_written(db.session, shows_table.name)
+  recount(venue_ids, artist_ids)
+  db.session.commit()
+  return old
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+partitions_cli = AppGroup('partitions', help='Maintain the monthly partitions of the shows table.')
+
+
+def require_postgresql():
+  if db.engine.dialect.name != 'postgresql':
+    raise click.UsageError('shows is only partitioned on PostgreSQL')
+  # create_all makes a plain table; the partitioning comes from the migrations
+  partitioned = db.session.execute(db.text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'shows'::regclass)"
+  )).scalar()
+  if not partitioned:
+    raise click.UsageError("shows is not partitioned; run 'flask db upgrade' first")
+
+
+@partitions_cli.command('create')
+@click.option('--ahead', default=3, show_default=True, help='Months to create after the current one.')
+def create_command(ahead):
+  """Create the partitions of the coming months."""
+  require_postgresql()
+  created = create_partitions(ahead)
+  click.echo('Created %d partitions%s' % (len(created), (': ' + ', '.join(created)) if created else '.'))
+
+
+@partitions_cli.command('archive')
+@click.option('--retain-months', type=int, required=True, help='Months of past shows to keep attached.')
+@click.option('--schema', default='archive', show_default=True, help='Schema archived partitions move to.')
+@click.option('--tablespace', help='Tablespace archived partitions move to.')
+@click.option('--drop', is_flag=True, help='Drop old partitions instead of archiving them.')
+def archive_command(retain_months, schema, tablespace, drop):
+  """Detach the partitions of old months and archive or drop them."""
+  require_postgresql()
+  archived = archive_partitions(retain_months, schema, tablespace, drop)
+  click.echo('%s %d partitions%s' % ('Dropped' if drop else 'Archived', len(archived),
+    (': ' + ', '.join(archived)) if archived else '.'))
@@ -0,0 +1,82 @@
+from models import db, Artist, Venue, Show
+from pagination import paginate, paginate_async
+
+#----------------------------------------------------------------------------#
+# Page queries.
+#----------------------------------------------------------------------------#
+
+# The select() statements of the listing and detail pages, run by the sync
+# views in app.py and by their async counterparts in async_views.py.
+
+
+class Listing:
+  # a paged listing: its statement and the columns it is ordered and paged
+  # by, which must identify a row uniquely. scalars=True pages through
+  # entities rather than rows.
+
+  def __init__(self, statement, columns, descending=False, scalars=False):
+    self.statement = statement
+    self.columns = columns
+    self.descending = descending
+    self.scalars = scalars
+
+  def key(self, item):
+    return tuple(getattr(item, column.key) for column in self.columns)
+
+  def paginate(self, session, cursor=None):
+    return paginate(session, self.statement, self.columns, self.key, cursor=cursor,
+      descending=self.descending, scalars=self.scalars)
+
+  async def paginate_async(self, session, cursor=None):
+    return await paginate_async(session, self.statement, self.columns, self.key, cursor=cursor,
+      descending=self.descending, scalars=self.scalars)
+
+
+def recently_listed(model):
+  return db.select(model).order_by(model.date_listed.desc()).limit(5)
+
+
+# upcoming show counts are read from the venue's own counter, and rows come
+# ordered by area so the areas can be built in a single pass. Pages are keyed
+# on (city, state, id) so every page stays grouped by area.
+venues = Listing(
+  db.select(
+    Venue.city, Venue.state, Venue.id, Venue.name,
+    Venue.upcoming_shows_count.label('num_upcoming_shows')
+  ),
+  [Venue.city, Venue.state, Venue.id]
+)
+
+artists = Listing(db.select(Artist), [Artist.id], scalars=True)
+
+# one join over shows, venues and artists selecting only the columns the
+# template renders; rows are returned as-is instead of ORM objects. Newest
+# shows first, paged on (start_time, id).
+shows = Listing(
+  db.select(
+    Show.id,
+    Show.venue_id,
+    Venue.name.label('venue_name'),
+    Show.artist_id,
+    Artist.name.label('artist_name'),
+    Artist.image_link.label('artist_image_link'),
+    Show.start_time
+  ).join(Venue, Venue.id == Show.venue_id)
+    .join(Artist, Artist.id == Show.artist_id),
+  [Show.start_time, Show.id],
+  descending=True
+)
+
+
+def venue_detail(venue_id):
+  # the venue, its shows and each show's artist in one joined query
+  return db.select(Venue).options(
+      db.joinedload(Venue.shows).joinedload(Show.artist).load_only(Artist.name, Artist.image_link)
+    ).where(Venue.id == venue_id)
+
+
+def artist_detail(artist_id):
+  # the artist, its shows and each show's venue in one joined query
+  return db.select(Artist).options(
+      db.joinedload(Artist.shows).joinedload(Show.venue).load_only(Venue.name, Venue.image_link)
+    ).where(Artist.id == artist_id)
@@ -0,0 +1,60 @@
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+#----------------------------------------------------------------------------#
+# Read-replica routing.
+#----------------------------------------------------------------------------#
+
+# Reads made while serving GET and HEAD requests go to the 'replica' bind
+# when one is configured. Everything else, and every read made after a
+# write, goes to the primary. A client that wrote keeps reading from the
+# primary for READ_YOUR_WRITES_SECONDS, so it sees its own writes even if
+# the replica lags behind.
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'fyyur_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def reads_from_replica():
+  if not has_request_context() or request.method not in READ_METHODS:
+    return False
+  if g.get('db_written') or g.get('use_primary'):
+    return False
+  try:
+    return float(request.cookies.get(STICKY_COOKIE, 0)) < time.time()
+  except ValueError:
+    return True
+
+
+class RoutingSession(Session):
+
+  def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+    if bind is None:
+      if self._flushing or getattr(clause, 'is_dml', False):
+        if has_request_context():
+          g.db_written = True
+      elif REPLICA_BIND in self._db.engines and reads_from_replica():
+        return self._db.engines[REPLICA_BIND]
+    return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def primary(view):
+  # for GET views that must see the primary, e.g. ones that write
+  @wraps(view)
+  def wrapper(**kwargs):
+    g.use_primary = True
+    return view(**kwargs)
+  return wrapper
+
+
+def init_app(app):
+  @app.after_request
+  def stick_to_primary(response):
+    if g.get('db_written') and REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+      seconds = app.config.get('READ_YOUR_WRITES_SECONDS', 10)
+      response.set_cookie(STICKY_COOKIE, '%.3f' % (time.time() + seconds), max_age=seconds, httponly=True)
+    return response
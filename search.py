@@ -0,0 +1,250 @@
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from models import db, Artist, Venue, Show
+
+#----------------------------------------------------------------------------#
+# In-process search index for artists and venues.
+#----------------------------------------------------------------------------#
+
+TOKEN_RE = re.compile(r'\w+')
+GENRE_FILTER_RE = re.compile(r'genre:(?:"([^"]+)"|(\S+))', re.IGNORECASE)
+
+# how much a match in each field counts towards a document's rank
+FIELD_WEIGHTS = {'name': 3.0, 'genres': 2.0, 'city': 1.0, 'state': 1.0}
+# a term that only matches as a prefix of an indexed word ranks lower
+PREFIX_WEIGHT = 0.5
+
+
+def tokenize(text):
+  return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def parse_query(query):
+  # splits 'jazz genre:"Hip-Hop"' into search terms and genre filters
+  genres = [(quoted or bare).lower() for quoted, bare in GENRE_FILTER_RE.findall(query or '')]
+  terms = tokenize(GENRE_FILTER_RE.sub(' ', query or ''))
+  return terms, genres
+
+
+class Collection:
+  # inverted index over the documents of one model
+
+  def __init__(self):
+    self.docs = {}
+    self.postings = defaultdict(dict)
+    self.vocabulary = []
+    self.upcoming = defaultdict(list)
+
+  def add(self, doc_id, name, city, state, genres):
+    self.remove(doc_id)
+    genres = genres or []
+    terms = set()
+    fields = {'name': name, 'city': city, 'state': state, 'genres': ' '.join(genres)}
+    for field, text in fields.items():
+      for term in tokenize(text):
+        posting = self.postings[term]
+        if not posting:
+          bisect.insort(self.vocabulary, term)
+        posting[doc_id] = max(posting.get(doc_id, 0), FIELD_WEIGHTS[field])
+        terms.add(term)
+    self.docs[doc_id] = {
+      'name': name or '',
+      'genres': {genre.lower() for genre in genres},
+      'terms': terms
+    }
+
+  def remove(self, doc_id):
+    doc = self.docs.pop(doc_id, None)
+    if doc is None:
+      return
+    for term in doc['terms']:
+      posting = self.postings[term]
+      del posting[doc_id]
+      if not posting:
+        del self.postings[term]
+        del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+  def add_upcoming(self, doc_id, start_time):
+    bisect.insort(self.upcoming[doc_id], start_time)
+
+  def remove_upcoming(self, doc_id, start_time):
+    times = self.upcoming.get(doc_id)
+    if times and start_time in times:
+      times.remove(start_time)
+
+  def count_upcoming(self, doc_id, now):
+    times = self.upcoming.get(doc_id)
+    if not times:
+      return 0
+    return len(times) - bisect.bisect_right(times, now)
+
+  def match(self, term):
+    # exact matches keep their full weight, prefix matches are discounted
+    scores = dict(self.postings.get(term, {}))
+    i = bisect.bisect_right(self.vocabulary, term)
+    while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+      for doc_id, weight in self.postings[self.vocabulary[i]].items():
+        scores[doc_id] = max(scores.get(doc_id, 0), weight * PREFIX_WEIGHT)
+      i += 1
+    return scores
+
+  def search(self, terms, genres=()):
+    if terms:
+      scores = None
+      for term in terms:
+        matches = self.match(term)
+        if scores is None:
+          scores = matches
+        else:
+          scores = {doc_id: score + matches[doc_id] for doc_id, score in scores.items() if doc_id in matches}
+        if not scores:
+          return []
+    else:
+      scores = dict.fromkeys(self.docs, 0)
+
+    if genres:
+      wanted = set(genres)
+      scores = {doc_id: score for doc_id, score in scores.items() if wanted <= self.docs[doc_id]['genres']}
+
+    return sorted(scores, key=lambda doc_id: (-scores[doc_id], self.docs[doc_id]['name'].lower(), doc_id))
+
+
+class SearchIndex:
+  # Answers artist and venue searches from memory. The index is built from
+  # the database on first use, kept current by the create/edit/delete views
+  # and rebuilt every SEARCH_INDEX_REFRESH seconds so that writes made by
+  # other worker processes are picked up; until then, their results lag.
+
+  def __init__(self, app=None):
+    self.lock = threading.RLock()
+    # held while building, so concurrent searches start one build, not many
+    self.build_lock = threading.Lock()
+    self.artists = Collection()
+    self.venues = Collection()
+    self.shows = {}
+    self.built_at = None
+    self.refresh_interval = None
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    self.refresh_interval = app.config.get('SEARCH_INDEX_REFRESH', 300)
+    app.extensions['search_index'] = self
+
+  def build(self):
+    artists, venues, shows = Collection(), Collection(), {}
+    for row in db.session.query(Artist.id, Artist.name, Artist.city, Artist.state, Artist.genres):
+      artists.add(row.id, row.name, row.city, row.state, row.genres)
+    for row in db.session.query(Venue.id, Venue.name, Venue.city, Venue.state, Venue.genres):
+      venues.add(row.id, row.name, row.city, row.state, row.genres)
+    upcoming = db.session.query(Show.id, Show.venue_id, Show.artist_id, Show.start_time) \
+      .filter(Show.start_time > datetime.now())
+    for row in upcoming:
+      shows[row.id] = (row.venue_id, row.artist_id, row.start_time)
+      venues.add_upcoming(row.venue_id, row.start_time)
+      artists.add_upcoming(row.artist_id, row.start_time)
+
+    with self.lock:
+      self.artists, self.venues, self.shows = artists, venues, shows
+      self.built_at = time.monotonic()
+
+  def is_stale(self):
+    return self.built_at is None or (
+      self.refresh_interval and time.monotonic() - self.built_at > self.refresh_interval)
+
+  def ensure_built(self):
+    if not self.is_stale():
+      return
+    if self.built_at is None:
+      # nothing to answer from yet, so wait for whoever is building
+      with self.build_lock:
+        if self.built_at is None:
+          self.build()
+    elif self.build_lock.acquire(blocking=False):
+      # one caller refreshes; the others keep using the current index
+      try:
+        if self.is_stale():
+          self.build()
+      finally:
+        self.build_lock.release()
+
+  #  Incremental updates
+  #  ----------------------------------------------------------------
+
+  def add_artist(self, artist):
+    if self.built_at is None:
+      return
+    with self.lock:
+      self.artists.add(artist.id, artist.name, artist.city, artist.state, artist.genres)
+
+  def add_venue(self, venue):
+    if self.built_at is None:
+      return
+    with self.lock:
+      self.venues.add(venue.id, venue.name, venue.city, venue.state, venue.genres)
+
+  def add_show(self, show):
+    if self.built_at is None or show.start_time <= datetime.now():
+      return
+    with self.lock:
+      self.shows[show.id] = (show.venue_id, show.artist_id, show.start_time)
+      self.venues.add_upcoming(show.venue_id, show.start_time)
+      self.artists.add_upcoming(show.artist_id, show.start_time)
+
+  def remove_artist(self, artist_id):
+    self.remove_artists([artist_id])
+
+  def remove_venue(self, venue_id):
+    self.remove_venues([venue_id])
+
+  def remove_artists(self, artist_ids):
+    artist_ids = set(artist_ids)
+    with self.lock:
+      for artist_id in artist_ids:
+        self.artists.remove(artist_id)
+        self.artists.upcoming.pop(artist_id, None)
+      self._remove_shows(lambda venue_id, show_artist_id: show_artist_id in artist_ids)
+
+  def remove_venues(self, venue_ids):
+    venue_ids = set(venue_ids)
+    with self.lock:
+      for venue_id in venue_ids:
+        self.venues.remove(venue_id)
+        self.venues.upcoming.pop(venue_id, None)
+      self._remove_shows(lambda show_venue_id, artist_id: show_venue_id in venue_ids)
+
+  def _remove_shows(self, predicate):
+    for show_id, (venue_id, artist_id, start_time) in list(self.shows.items()):
+      if predicate(venue_id, artist_id):
+        del self.shows[show_id]
+        self.venues.remove_upcoming(venue_id, start_time)
+        self.artists.remove_upcoming(artist_id, start_time)
+
+  #  Queries
+  #  ----------------------------------------------------------------
+
+  def search_artists(self, query, genres=()):
+    return self.search('artists', query, genres)[1]
+
+  def search_venues(self, query, genres=()):
+    return self.search('venues', query, genres)[1]
+
+  def search(self, collection_name, query, genres=(), limit=None):
+    # returns the number of matches and the best `limit` of them
+    self.ensure_built()
+    terms, query_genres = parse_query(query)
+    genres = query_genres + [genre.lower() for genre in genres]
+    now = datetime.now()
+    with self.lock:
+      collection = getattr(self, collection_name)
+      doc_ids = collection.search(terms, genres)
+      return len(doc_ids), [{
+        'id': doc_id,
+        'name': collection.docs[doc_id]['name'],
+        'num_upcoming_shows': collection.count_upcoming(doc_id, now)
+      } for doc_id in doc_ids[:limit]]
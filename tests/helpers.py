@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from models import db, Artist, Venue, Show
+
+#----------------------------------------------------------------------------#
+# Test data.
+#----------------------------------------------------------------------------#
+
+# Rows are added through the session, so the counters and write_versions are
+# kept current as they are in the app; call these inside an app context.
+
+# the bearer token the test app's /bulk endpoints accept
+BULK_DELETE_TOKEN = 'test-token'
+
+
+def add_venue(name='The Musical Hop', city='San Francisco', state='CA', genres=('Jazz',)):
+  venue = Venue(name=name, city=city, state=state, address='1015 Folsom Street', phone='123-123-1234',
+    genres=list(genres), seeking_talent=False, date_listed=datetime.now())
+  db.session.add(venue)
+  db.session.commit()
+  return venue
+
+
+def add_artist(name='Guns N Petals', city='San Francisco', state='CA', genres=('Rock n Roll',)):
+  artist = Artist(name=name, city=city, state=state, phone='326-123-5000',
+    genres=list(genres), seeking_venue=False, date_listed=datetime.now())
+  db.session.add(artist)
+  db.session.commit()
+  return artist
+
+
+def add_show(venue, artist, days):
+  # days from now, negative for past shows
+  show = Show(venue_id=venue.id, artist_id=artist.id,
+    start_time=datetime.now().replace(microsecond=0) + timedelta(days=days))
+  db.session.add(show)
+  db.session.commit()
+  return show
+
+
+def checked_out(app):
+  # connections of the app's pool that have not been returned to it
+  with app.app_context():
+    return db.engine.pool.checkedout()
@@ -0,0 +1,32 @@
+import pytest
+
+from helpers import add_artist, checked_out
+
+
+def test_streamed_page_returns_its_connection(app, client, catalogue):
+  for _ in range(3):
+    assert len(client.get('/api/v1/shows?per_page=5').get_json()['data']) == 5
+  assert checked_out(app) == 0
+
+
+def test_fields_limit_the_response(client, catalogue):
+  body = client.get('/api/v1/venues/1?fields=id,name').get_json()
+  assert body == {'id': 1, 'name': 'Venue 0'}
+  assert client.get('/api/v1/venues/1?fields=id,password').status_code == 400
+  assert client.get('/api/v1/venues/99').get_json()['error'] == 'Not Found'
+
+
+@pytest.mark.parametrize('path', ['/api/v1/artists/search', '/api/v1/venues/search?q=%20'])
+def test_search_needs_a_term_or_genre(client, catalogue, path):
+  assert client.get(path).status_code == 400
+
+
+def test_search_returns_the_best_page_and_the_total(app, client):
+  with app.app_context():
+    for number in range(5):
+      add_artist('The Band %d' % number)
+    add_artist('Bandit Queen')
+  body = client.get('/api/v1/artists/search?q=band&per_page=2').get_json()
+  assert body['count'] == 6
+  # exact word matches rank above prefix matches
+  assert [row['name'] for row in body['data']] == ['The Band 0', 'The Band 1']
@@ -0,0 +1,96 @@
+import asyncio
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import event
+
+from async_views import AsyncReads, database
+from models import db
+
+
+@pytest.fixture
+def asgi(app):
+  # calls the ASGI app, returning (status, headers, body) and the number of
+  # statements the sync engine ran meanwhile
+  asgi_app = AsyncReads(app, WsgiToAsgi(app))
+  with app.app_context():
+    sync_engine = db.engine
+
+  def call(method, path, headers=(), form=None):
+    body = urlencode(form, doseq=True).encode() if form else b''
+    if form:
+      headers = list(headers) + [('content-type', 'application/x-www-form-urlencoded'),
+        ('content-length', str(len(body)))]
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+      'headers': [(name.encode(), value.encode()) for name, value in headers],
+      'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 80), 'root_path': ''}
+    messages = []
+    statements = []
+
+    async def receive():
+      return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+      messages.append(message)
+
+    async def run():
+      try:
+        await asgi_app(scope, receive, send)
+      finally:
+        # the async engine belongs to this event loop
+        await database.dispose()
+
+    count = lambda *args: statements.append(1)
+    event.listen(sync_engine, 'before_cursor_execute', count)
+    try:
+      asyncio.run(run())
+    finally:
+      event.remove(sync_engine, 'before_cursor_execute', count)
+    headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], headers, body, len(statements)
+
+  return call
+
+
+@pytest.mark.parametrize('path, text', [
+  ('/', b'Venue 2'),
+  ('/venues', b'Venue 2'),
+  ('/venues/1', b'Artist 2'),
+  ('/artists', b'Artist 2'),
+  ('/artists/1', b'Venue 2'),
+  ('/shows', b'Artist 2')
+])
+def test_reads_run_on_the_async_engine(asgi, catalogue, path, text):
+  status, headers, body, sync_statements = asgi('GET', path)
+  assert status == 200
+  assert text in body
+  assert sync_statements == 0
+
+
+def test_async_pages_match_the_sync_views(app, client, asgi, catalogue):
+  app.extensions['page_cache'].backend = None
+  for path in ('/venues?per_page=2', '/shows?per_page=4', '/artists/2'):
+    assert asgi('GET', path)[2] == client.get(path).data
+
+
+def test_unknown_detail_page_is_not_found(asgi, catalogue):
+  assert asgi('GET', '/venues/99')[0] == 404
+
+
+def test_unchanged_page_is_not_modified(asgi, catalogue):
+  status, headers, body, sync_statements = asgi('GET', '/venues')
+  repeat = asgi('GET', '/venues', headers=[('if-none-match', headers['etag'])])
+  assert repeat[0] == 304 and repeat[2] == b''
+  # HEAD runs the async view, without a body
+  head = asgi('HEAD', '/venues')
+  assert head[0] == 200 and head[2] == b''
+
+
+def test_other_routes_fall_back_to_wsgi(asgi, catalogue):
+  status, headers, body, sync_statements = asgi('GET', '/artists/1/edit')
+  assert status == 200 and sync_statements > 0
+  status, headers, body, sync_statements = asgi('POST', '/venues/search', form={'search_term': 'venue 1'})
+  assert status == 200 and b'Venue 1' in body
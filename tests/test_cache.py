@@ -0,0 +1,53 @@
+from cache import FileSystemBackend
+from models import db, Artist
+from helpers import add_venue
+
+
+def test_repeat_visit_is_served_from_the_page_cache(client, catalogue):
+  assert 'X-Cache' not in client.get('/venues/1').headers
+  assert client.get('/venues/1').headers['X-Cache'] == 'HIT'
+
+
+def test_write_outside_the_app_invalidates_pages(app, client, catalogue):
+  # e.g. made by another worker, whose page cache this one never sees
+  first = client.get('/venues')
+  client.get('/venues')
+  with app.app_context():
+    add_venue('Park Square Live Music & Coffee')
+  after = client.get('/venues', headers={'If-None-Match': first.headers['ETag']})
+  assert after.status_code == 200
+  assert after.headers['ETag'] != first.headers['ETag']
+  assert 'X-Cache' not in after.headers
+  assert b'Park Square Live Music &amp; Coffee' in after.data
+
+
+def test_write_through_a_form_invalidates_pages(client, catalogue):
+  first = client.get('/venues')
+  client.post('/venues/create', data={'name': 'The Dueling Pianos Bar', 'city': 'New York', 'state': 'NY',
+    'address': '335 Delancey Street', 'phone': '914-003-1132', 'genres': ['Classical']})
+  # the first page after the form shows its flashed message and is not cached
+  client.get('/venues')
+  after = client.get('/venues', headers={'If-None-Match': first.headers['ETag']})
+  assert after.status_code == 200
+  assert b'The Dueling Pianos Bar' in after.data
+
+
+def test_page_changes_with_the_tables_it_joins(app, client, catalogue):
+  # the venue page shows the names of its artists
+  client.get('/venues/1')
+  with app.app_context():
+    db.session.get(Artist, 1).name = 'The Wild Sax Band'
+    db.session.commit()
+  assert b'The Wild Sax Band' in client.get('/venues/1').data
+
+
+def test_filesystem_backend_shares_pages_through_files(tmp_path):
+  entry = {'body': '<h1>The Musical Hop</h1>', 'version': 'abc', 'created': 1.5}
+  FileSystemBackend(str(tmp_path)).set('/venues/1?', entry)
+  # another worker's backend on the same directory
+  backend = FileSystemBackend(str(tmp_path))
+  assert backend.get('/venues/1?') == entry
+  assert backend.get('/venues/2?') is None
+  with open(backend.path('pages', '/venues/1?'), 'w') as f:
+    f.write('not json')
+  assert backend.get('/venues/1?') is None
@@ -0,0 +1,74 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import orm
+
+import conditional
+from helpers import add_artist, add_show, add_venue
+from models import db, WriteVersion
+
+
+def test_repeat_visit_is_not_modified(client, catalogue):
+  first = client.get('/venues')
+  assert first.headers['ETag']
+  repeat = client.get('/venues', headers={'If-None-Match': first.headers['ETag']})
+  assert repeat.status_code == 304
+  since = client.get('/venues', headers={'If-Modified-Since': first.headers['Last-Modified']})
+  assert since.status_code == 304
+
+
+def test_page_changes_when_a_show_starts(app, client, monkeypatch):
+  with app.app_context():
+    venue, artist = add_venue(), add_artist()
+    venue_id, start_time = venue.id, add_show(venue, artist, 1).start_time
+  before = client.get('/venues/%d' % venue_id)
+
+  class Later(datetime):
+    @classmethod
+    def now(cls, tz=None):
+      return datetime.now(tz) + timedelta(days=2)
+
+  monkeypatch.setattr(conditional, 'datetime', Later)
+  after = client.get('/venues/%d' % venue_id, headers={'If-None-Match': before.headers['ETag']})
+  assert after.status_code == 200
+  assert after.headers['ETag'] != before.headers['ETag']
+  assert after.last_modified >= start_time.astimezone().replace(microsecond=0)
+
+
+def test_concurrent_first_writes_both_bump_the_version(app):
+  # the second commit waits on the first one's new row, then bumps it
+  # instead of inserting it again
+  with app.app_context():
+    engine = db.engine
+  first, second = orm.Session(engine), orm.Session(engine)
+  errors = []
+
+  def commit_second():
+    try:
+      conditional.record_written(second, 'venues')
+      second.commit()
+    except Exception as error:
+      errors.append(error)
+    finally:
+      second.close()
+
+  try:
+    conditional.record_written(first, 'venues')
+    conditional.bump_write_versions(first)
+    thread = threading.Thread(target=commit_second)
+    thread.start()
+    with engine.connect() as connection:
+      for _ in range(50):
+        if connection.execute(db.text("SELECT count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND wait_event_type = 'Lock'")).scalar():
+          break
+        connection.rollback()
+        time.sleep(0.1)
+    first.commit()
+    thread.join()
+  finally:
+    first.close()
+  assert errors == []
+  with app.app_context():
+    assert db.session.get(WriteVersion, 'venues').version == 2
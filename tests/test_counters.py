@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from models import db, Artist, Venue, Show
+from counters import reconcile, rollover
+from helpers import add_artist, add_show, add_venue
+
+
+def counters(model, entity_id):
+  db.session.expire_all()
+  entity = db.session.get(model, entity_id)
+  return entity.upcoming_shows_count, entity.past_shows_count, entity.next_show_time
+
+
+def test_new_shows_are_counted(context):
+  venue, artist = add_venue(), add_artist()
+  soon = add_show(venue, artist, 3)
+  add_show(venue, artist, 10)
+  add_show(venue, artist, -5)
+  assert counters(Venue, venue.id) == (2, 1, soon.start_time)
+  assert counters(Artist, artist.id) == (2, 1, soon.start_time)
+
+
+def test_moved_show_is_counted_on_its_new_side(context):
+  venue, artist = add_venue(), add_artist()
+  show = add_show(venue, artist, 3)
+  other_venue = add_venue('Park Square Live Music & Coffee')
+  show.venue_id = other_venue.id
+  show.start_time = datetime.now() - timedelta(days=1)
+  db.session.commit()
+  assert counters(Venue, venue.id) == (0, 0, None)
+  assert counters(Venue, other_venue.id) == (0, 1, None)
+  assert counters(Artist, artist.id) == (0, 1, None)
+
+
+def test_deleted_show_is_uncounted(context):
+  venue, artist = add_venue(), add_artist()
+  show = add_show(venue, artist, 3)
+  db.session.delete(show)
+  db.session.commit()
+  assert counters(Venue, venue.id) == (0, 0, None)
+  assert counters(Artist, artist.id) == (0, 0, None)
+
+
+def test_show_created_through_the_form_is_counted(app, client):
+  # the form posts the ids as strings
+  with app.app_context():
+    venue_id, artist_id = add_venue().id, add_artist().id
+  start_time = (datetime.now() + timedelta(days=2)).replace(microsecond=0)
+  client.post('/shows/create', data={
+    'artist_id': str(artist_id), 'venue_id': str(venue_id), 'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S')})
+  with app.app_context():
+    assert counters(Venue, venue_id) == (1, 0, start_time)
+    assert counters(Artist, artist_id) == (1, 0, start_time)
+
+
+def test_rollover_moves_started_shows_to_past(context):
+  venue, artist = add_venue(), add_artist()
+  first = add_show(venue, artist, 1)
+  second = add_show(venue, artist, 5)
+  rollover(now=first.start_time + timedelta(minutes=1))
+  assert counters(Venue, venue.id) == (1, 1, second.start_time)
+  assert counters(Artist, artist.id) == (1, 1, second.start_time)
+
+
+def test_reconcile_repairs_counters(context):
+  venue, artist = add_venue(), add_artist()
+  add_show(venue, artist, 1)
+  add_show(venue, artist, -1)
+  db.session.execute(db.update(Venue).values(upcoming_shows_count=7, past_shows_count=7, next_show_time=None))
+  db.session.commit()
+  reconcile()
+  upcoming, past, next_show_time = counters(Venue, venue.id)
+  assert (upcoming, past) == (1, 1)
+  assert next_show_time == db.session.execute(db.select(db.func.max(Show.start_time))).scalar()
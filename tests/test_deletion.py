@@ -0,0 +1,56 @@
+import pytest
+
+from models import db, Artist, Show, Venue
+from helpers import BULK_DELETE_TOKEN
+
+AUTHORIZATION = {'Authorization': 'Bearer ' + BULK_DELETE_TOKEN}
+
+
+def test_deletes_venues_with_their_shows(app, client, catalogue):
+  response = client.post('/bulk/venues/delete', json={'ids': [1, 2, 99]}, headers=AUTHORIZATION)
+  assert response.status_code == 200
+  assert response.get_json() == {'deleted': [1, 2], 'count': 2}
+  with app.app_context():
+    assert db.session.execute(db.select(Venue.id)).scalars().all() == [3]
+    assert set(db.session.execute(db.select(Show.venue_id)).scalars()) == {3}
+
+
+def test_recounts_the_other_side(app, client, catalogue):
+  client.post('/bulk/venues/delete', json={'ids': [1, 2]}, headers=AUTHORIZATION)
+  with app.app_context():
+    for artist in db.session.execute(db.select(Artist)).scalars():
+      assert (artist.upcoming_shows_count, artist.past_shows_count) == (1, 1)
+
+
+def test_deleted_rows_leave_the_pages(client, catalogue):
+  assert b'Artist 2' in client.get('/artists').data
+  client.post('/bulk/artists/delete', json={'ids': [3]}, headers=AUTHORIZATION)
+  assert b'Artist 2' not in client.get('/artists').data
+  assert client.get('/artists/3').status_code == 404
+
+
+def test_requires_the_token(client, catalogue):
+  assert client.post('/bulk/venues/delete', json={'ids': [1]}).status_code == 401
+  assert client.post('/bulk/venues/delete', json={'ids': [1]},
+    headers={'Authorization': 'Bearer wrong'}).status_code == 401
+  assert client.post('/bulk/shows/delete', json={'ids': [1]}, headers=AUTHORIZATION).status_code == 404
+
+
+def test_disabled_without_a_token(app, client, catalogue, monkeypatch):
+  monkeypatch.setitem(app.config, 'BULK_DELETE_TOKEN', '')
+  assert client.post('/bulk/venues/delete', json={'ids': [1]}, headers=AUTHORIZATION).status_code == 404
+
+
+@pytest.mark.parametrize('body', [
+  [1, 2],
+  {'ids': 1},
+  {'ids': ['1']},
+  {'ids': [True]},
+  {'ids': [1.5]},
+  {}
+])
+def test_rejects_anything_but_integer_ids(app, client, catalogue, body):
+  response = client.post('/bulk/venues/delete', json=body, headers=AUTHORIZATION)
+  assert response.status_code == 400
+  with app.app_context():
+    assert db.session.execute(db.select(db.func.count()).select_from(Venue)).scalar() == 3
@@ -0,0 +1,24 @@
+import csv
+import io
+
+import pytest
+
+from helpers import checked_out
+
+EXPORT_TOKEN = 'export-token'
+
+
+@pytest.fixture
+def exports(app, monkeypatch):
+  monkeypatch.setitem(app.config, 'EXPORT_TOKEN', EXPORT_TOKEN)
+  return {'Authorization': 'Bearer ' + EXPORT_TOKEN}
+
+
+@pytest.mark.parametrize('kind, count', [('venues', 3), ('artists', 3), ('shows', 18)])
+def test_export_streams_every_row(app, client, catalogue, exports, kind, count):
+  # the rows are read from the database after the view has returned
+  response = client.get('/exports/%s?format=csv' % kind, headers=exports)
+  assert response.status_code == 200
+  rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+  assert [int(row['id']) for row in rows] == list(range(1, count + 1))
+  assert checked_out(app) == 0
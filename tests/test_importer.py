@@ -0,0 +1,34 @@
+import pytest
+
+from exporter import export
+from importer import import_file
+from models import db, Show
+
+
+def show_rows():
+  return sorted(db.session.execute(db.select(Show.venue_id, Show.artist_id, Show.start_time)).all())
+
+
+@pytest.mark.parametrize('format', ['csv', 'ndjson'])
+def test_exported_shows_import_again(app, catalogue, tmp_path, format):
+  path = tmp_path / ('shows.' + format)
+  with app.app_context():
+    before = show_rows()
+    path.write_bytes(b''.join(export('shows', format)))
+    db.session.execute(Show.__table__.delete())
+    db.session.commit()
+
+    imported, errors = import_file('shows', str(path))
+    assert (imported, errors) == (18, [])
+    assert show_rows() == before
+
+
+def test_import_reports_bad_rows(app, catalogue, tmp_path):
+  path = tmp_path / 'shows.ndjson'
+  path.write_text('{"venue_id": 1, "artist_id": 1, "start_time": "next tuesday"}\n'
+    '{"venue_id": 9, "artist_id": 1, "start_time": "2030-01-01T20:00:00"}\n'
+    '{"venue_id": 1, "artist_id": 1, "start_time": "2030-01-01T20:00:00"}\n')
+  with app.app_context():
+    imported, errors = import_file('shows', str(path))
+  assert imported == 1
+  assert errors == [(1, 'start_time: This field is required.'), (2, "unknown venue 9")]
@@ -0,0 +1,34 @@
+import json
+import os
+
+from flask import Flask
+
+import logs
+
+
+def read_log(path):
+  return [json.loads(line)['message'] for line in path.read_text().splitlines()]
+
+
+def test_each_process_writes_its_own_file(tmp_path):
+  # as under gunicorn's preload_app: the app is set up before the fork
+  app = Flask('test_logs')
+  app.config['LOG_FILE'] = str(tmp_path / 'fyyur-{pid}.log')
+  logs.init_app(app)
+  handler = app.logger.handlers[-1]
+  try:
+    app.logger.warning('from the parent')
+    child = os.fork()
+    if child == 0:
+      try:
+        app.logger.warning('from the child')
+        handler.stop()
+      finally:
+        os._exit(0)
+    os.waitpid(child, 0)
+    handler.stop()
+  finally:
+    app.logger.removeHandler(handler)
+
+  assert read_log(tmp_path / ('fyyur-%d.log' % os.getpid())) == ['from the parent']
+  assert read_log(tmp_path / ('fyyur-%d.log' % child)) == ['from the child']
@@ -0,0 +1,12 @@
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from models import db
+
+
+def test_failed_statement_is_not_left_timed(context):
+  with db.engine.connect() as connection:
+    with pytest.raises(DBAPIError):
+      connection.execute(db.text('SELECT missing_column FROM venues'))
+    assert connection.info['statement_started'] == []
+
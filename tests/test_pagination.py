@@ -0,0 +1,72 @@
+import base64
+import json
+
+import pytest
+
+from helpers import add_artist, add_show, add_venue
+
+
+def encode(payload):
+  return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def walk(client, path):
+  # follows the next cursors of a JSON API list and returns each page's ids
+  pages, cursor = [], None
+  while True:
+    body = client.get(path + ('&cursor=' + cursor if cursor else '')).get_json()
+    pages.append([row['id'] for row in body['data']])
+    cursor = body['next']
+    if cursor is None:
+      return pages
+
+
+def test_pages_cover_every_row_once(app, client):
+  with app.app_context():
+    for number in range(7):
+      add_artist('Artist %d' % number)
+  pages = walk(client, '/api/v1/artists?per_page=2&fields=id')
+  assert pages == [[1, 2], [3, 4], [5, 6], [7]]
+
+
+def test_prev_cursor_returns_the_previous_page(app, client):
+  with app.app_context():
+    for number in range(5):
+      add_artist('Artist %d' % number)
+  first = client.get('/api/v1/artists?per_page=2&fields=id').get_json()
+  second = client.get('/api/v1/artists?per_page=2&fields=id&cursor=' + first['next']).get_json()
+  back = client.get('/api/v1/artists?per_page=2&fields=id&cursor=' + second['prev']).get_json()
+  assert [row['id'] for row in second['data']] == [3, 4]
+  assert [row['id'] for row in back['data']] == [1, 2]
+
+
+def test_shows_are_paged_newest_first(app, client):
+  with app.app_context():
+    venue, artist = add_venue(), add_artist()
+    for days in (-2, 5, 1, -9, 3):
+      add_show(venue, artist, days)
+  first = client.get('/api/v1/shows?per_page=3&fields=id,start_time').get_json()
+  second = client.get('/api/v1/shows?per_page=3&fields=id,start_time&cursor=' + first['next']).get_json()
+  assert [row['id'] for row in first['data'] + second['data']] == [2, 5, 3, 1, 4]
+  assert second['next'] is None
+
+
+@pytest.mark.parametrize('path, payload', [
+  ('/api/v1/artists', {'d': 'next', 'k': ['1']}),
+  ('/api/v1/artists', {'d': 'next', 'k': [True]}),
+  ('/api/v1/artists', {'d': 'next', 'k': [1, 2]}),
+  ('/api/v1/artists', {'d': 'next', 'k': 1}),
+  ('/api/v1/artists', {'d': 'sideways', 'k': [1]}),
+  ('/api/v1/artists', {'k': [1]}),
+  ('/api/v1/shows', {'d': 'next', 'k': [5, 1]}),
+  ('/api/v1/shows', {'d': 'next', 'k': [{'dt': 'yesterday'}, 1]}),
+  ('/venues', {'d': 'next', 'k': ['San Francisco', 'CA', '1']}),
+  ('/artists', {'d': 'next', 'k': [{'dt': '2026-01-01T00:00:00'}]})
+])
+def test_malformed_cursor_is_rejected(client, path, payload):
+  assert client.get(path + '?cursor=' + encode(payload)).status_code == 400
+
+
+def test_cursor_that_is_not_base64_json_is_rejected(client):
+  assert client.get('/api/v1/artists?cursor=%25%25').status_code == 400
+  assert client.get('/api/v1/artists?cursor=' + encode('[]')[:-2]).status_code == 400
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, Show
+from partitions import create_partitions, partitions
+
+# far enough ahead that the migrations created none of these months
+LATER = datetime(2035, 1, 15)
+LATER_PARTITIONS = ['shows_2035_01', 'shows_2035_02']
+
+
+@pytest.fixture
+def later_partitions(app):
+  yield
+  with app.app_context():
+    for name in LATER_PARTITIONS:
+      db.session.execute(db.text('DROP TABLE IF EXISTS %s' % name))
+    db.session.commit()
+
+
+def show_partition(show_id):
+  return db.session.execute(db.text('SELECT tableoid::regclass::text FROM shows WHERE id = :id'),
+    {'id': show_id}).scalar()
+
+
+def test_create_moves_shows_out_of_the_default_partition(app, catalogue, later_partitions):
+  with app.app_context():
+    show = Show(venue_id=1, artist_id=1, start_time=datetime(2035, 1, 20, 21))
+    db.session.add(show)
+    db.session.commit()
+    assert show_partition(show.id) == 'shows_default'
+
+    assert create_partitions(ahead=1, now=LATER) == LATER_PARTITIONS
+    assert set(LATER_PARTITIONS) <= set(partitions().values())
+    assert show_partition(show.id) == 'shows_2035_01'
+    # already there
+    assert create_partitions(ahead=1, now=LATER) == []
+
+
+def test_cli_creates_the_coming_months(app):
+  result = app.test_cli_runner().invoke(args=['partitions', 'create', '--ahead', '0'])
+  assert result.exit_code == 0
+  with app.app_context():
+    assert datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0) in partitions()
@@ -0,0 +1,33 @@
+import pytest
+
+from budget import QueryBudgetExceeded
+
+# Every budgeted page, rendered with QUERY_BUDGET_MODE='raise' so a view or
+# template that starts issuing a query per row fails here.
+
+PAGES = [
+  '/',
+  '/venues',
+  '/venues/1',
+  '/venues/1/edit',
+  '/artists',
+  '/artists/1',
+  '/artists/1/edit',
+  '/shows',
+  '/api/v1/venues/1',
+  '/api/v1/artists/1',
+  '/api/v1/shows/1'
+]
+
+
+@pytest.mark.parametrize('path', PAGES)
+def test_page_stays_within_budget(client, catalogue, path):
+  # rendered, then served from the page cache
+  for _ in range(2):
+    assert client.get(path).status_code == 200
+
+
+def test_page_over_budget_raises(app, client, catalogue, monkeypatch):
+  monkeypatch.setattr(app.view_functions['venues'], 'query_budget', 0)
+  with pytest.raises(QueryBudgetExceeded, match='venues ran 2 SQL statements'):
+    client.get('/venues')
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Venue
+from routing import STICKY_COOKIE
+
+
+@pytest.fixture
+def executed(replica_app):
+  # the binds ('primary' or 'replica') statements ran on, in order
+  with replica_app.app_context():
+    engines = {'primary': db.engines[None], 'replica': db.engines['replica']}
+  binds = []
+  listeners = {name: lambda *args, name=name: binds.append(name) for name in engines}
+  for name, engine in engines.items():
+    event.listen(engine, 'before_cursor_execute', listeners[name])
+  yield binds
+  for name, engine in engines.items():
+    event.remove(engine, 'before_cursor_execute', listeners[name])
+
+
+def test_reads_go_to_the_replica(replica_app, catalogue, executed):
+  response = replica_app.test_client().get('/venues/1')
+  assert response.status_code == 200
+  assert executed and set(executed) == {'replica'}
+  assert STICKY_COOKIE not in response.headers.get('Set-Cookie', '')
+
+
+def test_writes_go_to_the_primary(replica_app, catalogue, executed):
+  response = replica_app.test_client().post('/venues/create', data={
+    'name': 'The Dueling Pianos Bar', 'city': 'New York', 'state': 'NY', 'address': '335 Delancey Street',
+    'phone': '914-003-1132', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/theduelingpianos'})
+  assert response.status_code == 302
+  assert executed and set(executed) == {'primary'}
+  assert STICKY_COOKIE in response.headers['Set-Cookie']
+
+
+def test_reads_after_a_flush_go_to_the_primary(replica_app, catalogue, executed):
+  with replica_app.test_request_context('/venues/1'):
+    venue = db.session.get(Venue, 1)
+    assert executed and set(executed) == {'replica'}
+    del executed[:]
+    venue.name = 'Renamed'
+    db.session.flush()
+    db.session.execute(db.select(Venue.name).where(Venue.id == 2)).scalar()
+    db.session.rollback()
+  assert executed and set(executed) == {'primary'}
+
+
+def test_sticky_cookie_reads_from_the_primary(replica_app, catalogue, executed):
+  client = replica_app.test_client()
+  client.set_cookie(STICKY_COOKIE, '%.3f' % (time.time() + 10))
+  assert client.get('/venues/1').status_code == 200
+  assert executed and set(executed) == {'primary'}
+
+  # once it has expired, reads go back to the replica
+  client.set_cookie(STICKY_COOKIE, '%.3f' % (time.time() - 1))
+  del executed[:]
+  assert client.get('/venues/1').status_code == 200
+  assert executed and set(executed) == {'replica'}
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from helpers import add_artist, add_venue
+from search import Collection
+
+
+def names(client, kind, query):
+  return [row['name'] for row in client.get('/api/v1/%s/search?q=%s' % (kind, query)).get_json()['data']]
+
+
+def test_fields_rank_by_weight():
+  collection = Collection()
+  collection.add(1, 'Blue Room', 'Austin', 'TX', ['Jazz'])
+  collection.add(2, 'Jazz Cellar', 'Austin', 'TX', ['Blues'])
+  collection.add(3, 'Cellar Door', 'Jazzville', 'TX', ['Rock n Roll'])
+  # a name match beats a genre match, which beats a prefix of the city
+  assert collection.search(['jazz']) == [2, 1, 3]
+  # every term must match, and the scores of the terms add up
+  assert collection.search(['cellar', 'jazz']) == [2, 3]
+  assert collection.search(['jazz'], genres=['blues']) == [2]
+
+
+def test_ties_are_ordered_by_name():
+  collection = Collection()
+  collection.add(1, 'Zed Hall', 'Austin', 'TX', [])
+  collection.add(2, 'Alpha Hall', 'Austin', 'TX', [])
+  assert collection.search(['hall']) == [2, 1]
+
+
+def test_new_venue_is_found_without_a_rebuild(app, client, catalogue):
+  assert names(client, 'venues', 'dueling') == []
+  client.post('/venues/create', data={
+    'name': 'The Dueling Pianos Bar', 'city': 'New York', 'state': 'NY', 'address': '335 Delancey Street',
+    'phone': '914-003-1132', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/theduelingpianos'})
+  built_at = app.extensions['search_index'].built_at
+  assert names(client, 'venues', 'dueling') == ['The Dueling Pianos Bar']
+  assert app.extensions['search_index'].built_at == built_at
+
+
+def test_renamed_artist_is_found_under_its_new_name(app, client, catalogue):
+  assert names(client, 'artists', 'artist%201') == ['Artist 1']
+  client.post('/artists/2/edit', data={
+    'name': 'The Wild Sax Band', 'city': 'San Francisco', 'state': 'CA', 'phone': '432-325-5432',
+    'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/thewildsaxband'})
+  assert names(client, 'artists', 'artist%201') == []
+  assert names(client, 'artists', 'sax') == ['The Wild Sax Band']
+
+
+def test_deleted_venue_and_its_shows_leave_the_index(client, catalogue):
+  assert names(client, 'venues', 'venue') == ['Venue 0', 'Venue 1', 'Venue 2']
+  artist = client.get('/api/v1/artists/search?q=artist%200').get_json()['data'][0]
+  client.get('/venues/1/delete')
+  assert names(client, 'venues', 'venue') == ['Venue 1', 'Venue 2']
+  after = client.get('/api/v1/artists/search?q=artist%200').get_json()['data'][0]
+  assert after['num_upcoming_shows'] == artist['num_upcoming_shows'] - 1
+
+
+def test_new_show_counts_as_upcoming(app, client):
+  with app.app_context():
+    venue_id, artist_id = add_venue().id, add_artist().id
+  assert client.get('/api/v1/venues/search?q=hop').get_json()['data'][0]['num_upcoming_shows'] == 0
+  client.post('/shows/create', data={'artist_id': str(artist_id), 'venue_id': str(venue_id),
+    'start_time': (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d %H:%M:%S')})
+  assert client.get('/api/v1/venues/search?q=hop').get_json()['data'][0]['num_upcoming_shows'] == 1
@@ -0,0 +1,12 @@
+import pytest
+
+from app import create_app
+
+
+class Settings:
+  SECRET_KEY = None
+
+
+def test_serving_requires_a_secret_key():
+  with pytest.raises(RuntimeError, match='SECRET_KEY'):
+    create_app(Settings, require_secret_key=True)
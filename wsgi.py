@@ -1,4 +1,6 @@
-from app import app
+from app import create_app
+
+app = create_app(require_secret_key=True)
 
 if __name__ == '__main__':
     app.run()